@@ -1,12 +1,24 @@
+from __future__ import annotations
 import os, sys
-import pandas as pd
+import argparse
 import shutil
+import threading
 import unicodedata
-from typing import Optional, Tuple
-import pyfiglet
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple
+from ship_search import ShipSearchIndex
+
+# pandas and NumPy (and the modules that need them: ship_schema, ship_snapshot, stats_engine) take most of the start up time,
+# so they are only imported when the data is loaded, which the menus do in the background (see DataLoader).
+# Nothing imported above needs them.
+if TYPE_CHECKING:
+    import pandas as pd
+    from stats_engine import AggregateCache
 
 # .exe creation command: 
-# pyinstaller --onefile --add-data "C:\Users\USER\OneDrive\Desktop\scraper\ship_stats_data;ship_stats_data" --add-data "C:\Users\USER\AppData\Roaming\Python\Python313\site-packages\pyfiglet;pyfiglet" al_stats_checker.py
+# pyinstaller --onefile --add-data "C:\Users\USER\OneDrive\Desktop\scraper\ship_stats_data;ship_stats_data" al_stats_checker.py
 
 # mapping users inputs of numerals to roman numerals
 # only ii is really used at time of writing (for sequel ships like houston ii)
@@ -21,6 +33,9 @@ SYMBOLS = {
     "µ": "muse"
 }
 
+# normalise_name results kept, well above the number of ship names
+NAME_CACHE_SIZE = 8192
+
 VALID_STATS = {
     "luck": "Luck",
     "speed": "Speed",
@@ -41,46 +56,304 @@ VALID_STATS = {
 
 VALID_LEVELS = ["1", "100", "120", "125"]
 
+# pyfiglet.figlet_format("Azur Lane stats comparer"), rendered once here instead of loading pyfiglet and its font at every start
+BANNER = r"""    _                      _                           _        _
+   / \    _____   _ _ __  | |    __ _ _ __   ___   ___| |_ __ _| |_ ___
+  / _ \  |_  / | | | '__| | |   / _` | '_ \ / _ \ / __| __/ _` | __/ __|
+ / ___ \  / /| |_| | |    | |__| (_| | | | |  __/ \__ \ || (_| | |_\__ \
+/_/   \_\/___|\__,_|_|    |_____\__,_|_| |_|\___| |___/\__\__,_|\__|___/
+
+
+  ___ ___  _ __ ___  _ __   __ _ _ __ ___ _ __
+ / __/ _ \| '_ ` _ \| '_ \ / _` | '__/ _ \ '__|
+| (_| (_) | | | | | | |_) | (_| | | |  __/ |
+ \___\___/|_| |_| |_| .__/ \__,_|_|  \___|_|
+                    |_|
+"""
+
+# per class table (and rarity) aggregates of every stat, shared by all comparisons
+# created by aggregate_cache() on first use
+_AGGREGATE_CACHE = None
+
+# turns on the timing instrumentation in ship_profiling.py, like --profile
+PROFILE_ENV_VAR = "AL_STATS_PROFILE"
+# values of it that mean profiling is off (ship_profiling.OFF_VALUES)
+PROFILE_OFF_VALUES = ("", "0", "false", "off", "no")
+
 def main() -> None:
-    
-    ship_data = load_ship_data()
+
+    args = parse_args()
+    if args.profile is not None:
+        # set for this module and for the copy batch_query and the others import by name (see the end of this file)
+        os.environ[PROFILE_ENV_VAR] = args.profile
+        import ship_profiling
+        try:
+            ship_profiling.enable(sys.modules[__name__], args.profile)
+        except ValueError as e:
+            sys.exit(str(e))
+    if args.batch is not None:
+        # imported here as batch_query imports this module itself
+        import batch_query
+        batch_query.run_batch_file(args.batch, args.output)
+        return
+    if args.serve:
+        import ship_server
+        ship_server.serve(args.host, args.port)
+        return
+    if args.query is not None:
+        import ship_query
+        try:
+            ship_query.print_results(ship_query.search(args.query, load_ship_data()))
+        except ValueError as e:
+            sys.exit(str(e))
+        return
+
+    # the menu is shown straight away, the data (and pandas) is loaded while the user reads it and makes a choice
+    data = DataLoader()
     print_intro()
 
     while True:
         print("\n1. Explore average stats of a ship.")
         print("2. Compare two ships")
-        print("3. Exit")
+        print("3. Search ships by stats")
+        print("4. Exit")
         choice = str(input("Choose an option by typing the corresponding number: "))  
 
         if choice == "1":
-            show_average_stats(ship_data)
+            show_average_stats(data.get())
         elif choice == "2":
-            compare_ships(ship_data)
+            compare_ships(data.get())
         elif choice == "3":
+            search_ships(data.get())
+        elif choice == "4":
             "Exited successfully"
             break
         else:
             print("Please enter a valid input.")
 
-def load_ship_data() -> dict:
+def parse_args() -> argparse.Namespace:
+    """
+    Command line options. With no options the program runs the interactive menus.
+    """
+    parser = argparse.ArgumentParser(description="Azur Lane ship stats checker")
+    parser.add_argument("--batch", metavar="QUERY_FILE",
+                        help="answer queries from a JSON lines or CSV file ('-' for stdin) instead of showing the menus, see batch_query.py")
+    parser.add_argument("--output", metavar="FILE", help="where to write batch results (default: stdout)")
+    parser.add_argument("--serve", action="store_true", help="run the HTTP query server instead of the menus, see ship_server.py")
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port for --serve (default: 8080)")
+    parser.add_argument("--profile", nargs="?", const="timing", metavar="MODES",
+                        help="print call counts and timings of the hot paths at exit, MODES can add cprofile and/or tracemalloc, see ship_profiling.py")
+    parser.add_argument("--query", help='print the ships matching a query instead of showing the menus, e.g. "CL level 120, anti-air > 400, sort by reload, limit 10", see ship_query.py')
+    return parser.parse_args()
+
+def aggregate_cache() -> AggregateCache:
+    """
+    The aggregates shared by every comparison (see stats_engine.py).
+    """
+    global _AGGREGATE_CACHE
+    if _AGGREGATE_CACHE is None:
+        from stats_engine import AggregateCache
+        _AGGREGATE_CACHE = AggregateCache([col for col in VALID_STATS.values() if col != "all"])
+    return _AGGREGATE_CACHE
+
+def load_ship_data(data_folder: Optional[str] = None) -> ShipData:
     """
-    load all ship data, a dictionary with 32 items: 4 levels for each of the 8 ship hull types
+    load all ship data, a mapping with 32 items: 4 levels for each of the 8 ship hull types
     each key is the name of the ship class and level, e.g. DD_Level_100
     each value is a pandas dataframe of the information
+    Tables are read from the compiled snapshot (see ship_snapshot.py) only when first accessed,
+    and the name manifest next to it tells find_ship which table to read.
+    If the csv files changed since they were built, everything is read from the csv files and the snapshot and
+    manifest are rebuilt.
+    Falls back to reading the csv files directly if the snapshot can't be used.
+    data_folder defaults to the bundled ship_stats_data folder.
     """
+    import ship_snapshot
+
     # Use resource_path so it works both in dev and bundled exe
-    data_folder = resource_path("ship_stats_data")
+    if data_folder is None:
+        data_folder = resource_path("ship_stats_data")
+
+    source = ship_snapshot.source_hash(data_folder)
+    try:
+        if not ship_snapshot.is_snapshot_stale(data_folder, source) and not ship_snapshot.is_manifest_stale(data_folder, source):
+            reader = ship_snapshot.SnapshotReader(ship_snapshot.snapshot_path(data_folder))
+            keys, name_index, display_names = ship_snapshot.read_manifest(ship_snapshot.manifest_path(data_folder))
+            ship_data = ShipData(keys=reader.keys(), loader=reader.read_table)
+            ship_data.set_name_index(name_index, display_names)
+            return ship_data
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # aggregates of the old tables don't need clearing, they are keyed on the table objects (see stats_engine.AggregateCache)
+    ship_data = ShipData(load_ship_data_from_csv(data_folder))
+    ship_data.build_name_index()
+    write_compiled_data(ship_data, data_folder, source)
+    return ship_data
+
+def write_compiled_data(ship_data: ShipData, data_folder: str, source: Optional[str] = None) -> None:
+    """
+    Write the snapshot and name manifest load_ship_data reads next time.
+    source is the ship_snapshot.source_hash of the csv files ship_data was read from, if already known.
+    Nothing is written from the bundled exe, the onefile exe extracts to a new temporary folder on every launch
+    (the snapshot is built before bundling instead, see al_stats_checker.spec).
+    """
+    import ship_snapshot
+
+    if getattr(sys, "frozen", False):
+        return
+    if source is None:
+        source = ship_snapshot.source_hash(data_folder)
+    try:
+        ship_snapshot.write_snapshot(ship_data, ship_snapshot.snapshot_path(data_folder), source)
+        ship_snapshot.write_manifest(ship_snapshot.manifest_path(data_folder), list(ship_data), ship_data.name_index,
+                                     ship_data.display_names, source)
+    except OSError:
+        # e.g. read-only install folder, just use the csv data this time
+        pass
+
+class DataLoader:
+    """
+    Runs load_ship_data in a background thread. get() waits for it to finish (raising anything it raised).
+    """
+    def __init__(self, data_folder: Optional[str] = None) -> None:
+        self._data_folder = data_folder
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._load, name="load_ship_data", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        try:
+            self._result = load_ship_data(self._data_folder)
+        except BaseException as e:
+            self._error = e
+
+    def get(self) -> ShipData:
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+def load_ship_data_from_csv(data_folder: str) -> dict:
+    """
+    The original loader: read every csv in data_folder into a dataframe, keyed by file name without .csv
+    Column types follow ship_schema.
+    """
+    import ship_schema
+
     ship_data = {}
 
-    for filename in os.listdir(data_folder):
+    for filename in sorted(os.listdir(data_folder)):
         if filename.endswith(".csv"):
             key = filename.replace(".csv", "")
             filepath = os.path.join(data_folder, filename)
-            df = pd.read_csv(filepath)
+            df = ship_schema.read_csv(filepath)
             ship_data[key] = df
     
     return ship_data
 
+class ShipData(Mapping):
+    """
+    The mapping returned by load_ship_data, keyed like DD_Level_100 with a dataframe per key.
+    Given a loader, tables are only read (with loader(key)) the first time they are accessed.
+    Also carries name_index so find_ship doesn't have to normalise every ship name on every lookup.
+    """
+    def __init__(self, tables: Optional[dict] = None, keys: Optional[list[str]] = None, loader=None) -> None:
+        self._tables = dict(tables or {})
+        self._keys = list(keys) if keys is not None else list(self._tables)
+        self._loader = loader
+        self.name_index = {}
+        self.display_names = {}
+        self._search_index = None
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        df = self._tables.get(key)
+        if df is None:
+            if self._loader is None or key not in self._keys:
+                raise KeyError(key)
+            df = self._tables[key] = self._loader(key)
+        return df
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def reuse_table(self, key: str, df: pd.DataFrame) -> None:
+        """
+        Use df (e.g. the same table from an older load, see ship_versions.apply_diff) for key instead of reading it,
+        so whatever is cached against that dataframe stays valid.
+        """
+        if key not in self._keys:
+            raise KeyError(key)
+        self._tables[key] = df
+
+    def loaded_keys(self) -> list[str]:
+        """
+        Keys of the tables that have actually been read so far.
+        """
+        return [key for key in self._keys if key in self._tables]
+
+    def build_name_index(self) -> None:
+        """
+        Maps each normalised ship name to {level: (key, row position)}, e.g.
+        {"laffey": {"100": ("DD_Level_100", 12), ...}}
+        Only the first match is kept, in the same order find_ship would scan the tables.
+        This reads every table; lazily loaded data gets its index from the name manifest instead.
+        """
+        self.update_name_index({}, {}, None)
+
+    def update_name_index(self, name_index: dict, display_names: dict, levels: Optional[set[str]]) -> None:
+        """
+        Start from an existing name index (e.g. of an older load of the same data) and redo only the given levels,
+        reading only the tables at those levels. levels=None redoes everything.
+        A name that appears in several tables keeps the first spelling seen for display.
+        """
+        name_index = {
+            normalized: {level: entry for level, entry in entries.items() if levels is not None and level not in levels}
+            for normalized, entries in name_index.items()
+        }
+        display_names = dict(display_names)
+        for key in self._keys:
+            level = key.rsplit("_", 1)[-1]
+            if levels is not None and level not in levels:
+                continue
+            for position, name in enumerate(self[key]["Ship Name"]):
+                if not isinstance(name, str):
+                    continue  # level 1 tables have blank rows for retrofits
+                normalized = normalise_name(name)
+                name_index.setdefault(normalized, {}).setdefault(level, (key, position))
+                display_names.setdefault(normalized, name)
+
+        # names no longer in any table
+        name_index = {normalized: entries for normalized, entries in name_index.items() if entries}
+        display_names = {normalized: name for normalized, name in display_names.items() if normalized in name_index}
+        self.set_name_index(name_index, display_names)
+
+    def set_name_index(self, name_index: dict, display_names: dict, search_index: Optional[ShipSearchIndex] = None) -> None:
+        """
+        display_names maps each normalised name to the name as written in the data.
+        search_index can be given if one was already built from exactly these names.
+        """
+        self.name_index = name_index
+        self.display_names = display_names
+        self._search_index = search_index
+
+    @property
+    def search_index(self) -> ShipSearchIndex:
+        """
+        Used to suggest ships when a name doesn't match exactly, built on first use.
+        """
+        if self._search_index is None:
+            self._search_index = ShipSearchIndex(self.display_names, self.name_index)
+        return self._search_index
+
 def resource_path(relative_path):
     """Get absolute path to resource (works for .exe and dev)"""
     if hasattr(sys, "_MEIPASS"):
@@ -91,8 +364,7 @@ def print_intro() -> None:
     """
     Called at program start to print the intro
     """
-    banner = pyfiglet.figlet_format("Azur Lane stats comparer")
-    print(banner)
+    print(BANNER)
     print("All stats assume 100 affinity. Data is gathered from the Azur Lane Wiki https://azurlane.koumakan.jp/wiki/List_of_Ships_by_Stats")
     print("\nNote that the information from here does not tell the full story on how powerful a ship is. It considers only raw stats and does not take into account other important factors of ship power such as equipment efficiencies and skills.")
     print("It is intended as a general indicator of strength out of interest, not a determinent of tier.")
@@ -130,6 +402,7 @@ def show_average_stats(ship_data: dict) -> None:
 
         if ship_row is None:
             print(f"Ship '{selected_ship}' not found at level {selected_level}. Please try again.")
+            print_suggestions(selected_ship, ship_data, selected_level)
             continue
 
         print(f"Options: {", ".join(sorted(VALID_STATS))}")
@@ -224,12 +497,14 @@ def compare_ships(ship_data: dict) -> None:
 
         if first_ship_row is None:
             print(f"Ship '{first_ship}' not found at level {selected_level}. Please try again.")
+            print_suggestions(first_ship, ship_data, selected_level)
             continue
 
         second_ship_row, second_class_df = find_ship(second_ship, selected_level, ship_data)
 
         if second_ship_row is None:
             print(f"Ship '{second_ship}' not found at level {selected_level}. Please try again.")
+            print_suggestions(second_ship, ship_data, selected_level)
             continue
 
         # Ensure both ships are from the same dataframe
@@ -282,6 +557,39 @@ def compare_ships(ship_data: dict) -> None:
                 print("Invalid choice, returning to main menu.")
                 return
 
+def positive_int(value: str) -> int:
+    """
+    argparse type for counts that have to be at least 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+def parse_stats(stats) -> list[str]:
+    """
+    Turns user stat names (list or comma separated string) into dataframe column names, expanding 'all'.
+    Raises ValueError on names not in VALID_STATS. Used by the non-interactive modes.
+    """
+    if isinstance(stats, str):
+        stats = stats.split(",")
+    elif not isinstance(stats, (list, tuple)):
+        raise ValueError("stats must be a comma separated string or a list of stat names")
+
+    columns = []
+    for stat in stats:
+        cleaned = str(stat).strip().lower()
+        if cleaned not in VALID_STATS:
+            raise ValueError(f"invalid stat '{cleaned}'")
+        if cleaned == "all":
+            return [col for col in VALID_STATS.values() if col != "all"]
+        columns.append(VALID_STATS[cleaned])
+    return columns
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
 def normalise_name(name: str) -> str:
     """
     Normalises ship names:
@@ -291,10 +599,12 @@ def normalise_name(name: str) -> str:
     - replace 'ß' with 'ss'
     - handle roman numerals
     - handle 'retrofit' keyword
+    Results are cached, the same names get normalised over and over (once per table, once per lookup).
     """
     name = name.lower().strip()
-    name = strip_accents(name)
-    name = name.replace("ß", "ss")
+    # plain ascii names have no accents or ß, which covers almost every ship
+    if not name.isascii():
+        name = name.translate(_NAME_TABLE)
 
     # replace "retrofit" with " (retrofit)" so it matches data
     if "retrofit" in name and "(retrofit)" not in name:
@@ -313,57 +623,133 @@ def strip_accents(text: str) -> str:
     """
     Filters accented letters like L'Opiniâtre to L'Opiniatre
     """
-    decomposed = unicodedata.normalize('NFD', text)
-    filtered_chars = []
+    if text.isascii():
+        return text
+    return text.translate(_ACCENT_TABLE)
 
-    for c in decomposed:
-        if unicodedata.category(c) != 'Mn':
-            filtered_chars.append(c)
-    
-    return ''.join(filtered_chars)
+class _AccentTable(dict):
+    """
+    str.translate table that maps each character to itself without its accents (combining marks),
+    worked out with unicodedata the first time the character is seen.
+    """
+    def __missing__(self, key: int) -> str:
+        decomposed = unicodedata.normalize('NFD', chr(key))
+        stripped = ''.join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+        self[key] = stripped
+        return stripped
+
+_ACCENT_TABLE = _AccentTable()
+# strip_accents followed by the ß replacement in a single pass
+_NAME_TABLE = _AccentTable({ord("ß"): "ss"})
+
+@dataclass(slots=True)
+class StatComparison:
+    """
+    How one stat of a ship compares to a group of ships in its class.
+    """
+    stat: str
+    value: object  # as stored in the table, may be NaN
+    mean: float
+    median: float
+    rank: int  # 1 = highest
+    count: int  # number of ships in the group with this stat
+
+@dataclass(slots=True)
+class ComparisonResult:
+    """
+    Returned by get_comparison. mode is one of COMPARISON_MODES, rarity is only set for "rarity".
+    """
+    ship_name: str
+    mode: str
+    rarity: Optional[str]
+    stats: list[StatComparison]
+
+@dataclass(slots=True)
+class StatDifference:
+    stat: str
+    first_value: object
+    second_value: object
+    difference: object  # first_value - second_value, None if either is missing
+
+@dataclass(slots=True)
+class TwoShipComparison:
+    """
+    Returned by get_two_ship_comparison.
+    """
+    first_name: str
+    second_name: str
+    stats: list[StatDifference]
 
-def compare_to_all(ship_row: pd.Series, class_df: pd.DataFrame, stats: list[str]) -> None:
+# "all": every ship in the class, "rarity": ships of the same rarity, "above_median": ships at or above the median
+COMPARISON_MODES = ("all", "rarity", "above_median")
+
+def get_comparison(ship_row: pd.Series, class_df: pd.DataFrame, stats: list[str], mode: str = "all") -> ComparisonResult:
     """
-    Compare this ship's stats to the mean/median of all ships in its class at this level.
+    Compare this ship's stats to the ships of its class at this level, without printing anything.
+    The numbers are the ones shown by compare_to_all, compare_to_rarity and compare_to_above_median.
     """
-    for stat in stats:
-        ship_value = ship_row[stat]
-        stat_series = class_df[stat].dropna()
+    if mode not in COMPARISON_MODES:
+        raise ValueError(f"mode must be one of {', '.join(COMPARISON_MODES)}")
+
+    rarity = ship_row["Rarity"] if mode == "rarity" else None
+    # aggregates for the class (or only the ships of the same rarity) are computed once and cached
+    class_stats = aggregate_cache().get(class_df, rarity).subset(stats)
+    values = [ship_row[stat] for stat in stats]
+
+    if mode == "above_median":
+        ranks = class_stats.above_median_ranks(values)
+        means, medians, counts = class_stats.above_median_mean, class_stats.above_median_median, class_stats.above_median_count
+    else:
+        ranks = class_stats.ranks(values)
+        means, medians, counts = class_stats.mean, class_stats.median, class_stats.count
+
+    results = [
+        StatComparison(stat, values[j], float(means[j]), float(medians[j]), int(ranks[j]), int(counts[j]))
+        for j, stat in enumerate(stats)
+    ]
+    return ComparisonResult(ship_row["Ship Name"], mode, rarity, results)
+
+def format_value(value) -> str:
+    """
+    A stat value for printing, "-" if it's missing (like the tables printed by ship_query and ship_versions).
+    """
+    import pandas as pd
+    return "-" if pd.isna(value) else str(value)
 
-        mean_val = stat_series.mean()
-        median_val = stat_series.median()
+def print_comparison(result: ComparisonResult) -> None:
+    for comparison in result.stats:
+        if result.mode == "rarity":
+            print(f"\nComparison for '{result.ship_name}' ({comparison.stat}) among {result.rarity} ships at this level:")
+        else:
+            print(f"\nComparison for '{result.ship_name}' ({comparison.stat}) at this level:")
+        print(f"Value: {format_value(comparison.value)}")
 
-        rank = (stat_series > ship_value).sum() + 1
+        if result.mode == "rarity":
+            group = f"{result.rarity} ships"
+        elif result.mode == "above_median":
+            group = "all ships above the median"
+        else:
+            group = "all ships"
+        print(f"Mean of {group}: {comparison.mean:.1f}")
+        print(f"Median of {group}: {comparison.median:.1f}")
 
-        print(f"\nComparison for '{ship_row['Ship Name']}' ({stat}) at this level:")
-        print(f"Value: {ship_value}")
-        print(f"Mean of all ships: {mean_val:.1f}")
-        print(f"Median of all ships: {median_val:.1f}")
-        print(f"Rank: {rank} out of {len(stat_series)} ships")
+        if result.mode == "rarity":
+            print(f"Rank: {comparison.rank} out of {comparison.count} {result.rarity} ships")
+        else:
+            print(f"Rank: {comparison.rank} out of {comparison.count} ships")
+
+def compare_to_all(ship_row: pd.Series, class_df: pd.DataFrame, stats: list[str]) -> None:
+    """
+    Compare this ship's stats to the mean/median of all ships in its class at this level.
+    """
+    print_comparison(get_comparison(ship_row, class_df, stats, "all"))
 
 def compare_to_rarity(ship_row: pd.Series, class_df: pd.DataFrame, stats: list[str]) -> None:
     """
     Compare this ship's stats to the mean/median of all ships in its class
     with the same rarity at this level.
     """
-    rarity = ship_row["Rarity"]
-
-    # Filter class_df down to only ships of the same rarity
-    rarity_df = class_df[class_df["Rarity"] == rarity]
-
-    for stat in stats:
-        ship_value = ship_row[stat]
-        stat_series = rarity_df[stat].dropna()
-
-        mean_val = stat_series.mean()
-        median_val = stat_series.median()
-        rank = (stat_series > ship_value).sum() + 1
-
-        print(f"\nComparison for '{ship_row['Ship Name']}' ({stat}) among {rarity} ships at this level:")
-        print(f"Value: {ship_value}")
-        print(f"Mean of {rarity} ships: {mean_val:.1f}")
-        print(f"Median of {rarity} ships: {median_val:.1f}")
-        print(f"Rank: {rank} out of {len(stat_series)} {rarity} ships")
+    print_comparison(get_comparison(ship_row, class_df, stats, "rarity"))
 
 
 def compare_to_above_median(ship_row: pd.Series, class_df: pd.DataFrame, stats: list[str]) -> None:
@@ -372,23 +758,7 @@ def compare_to_above_median(ship_row: pd.Series, class_df: pd.DataFrame, stats:
     above the median (i.e. the mean/median of only the upper half of ships within the stat base).
     This is for purposes of seeing how it compares to the "better" ships.
     """
-    for stat in stats:
-        ship_value = ship_row[stat]
-        stat_series = class_df[stat].dropna()
-
-        median_val = stat_series.median()
-        ships_above_median = stat_series[stat_series >= median_val]
-        mean_val_of_ships_above_med = ships_above_median.mean()
-        median_val_of_ships_above_med = ships_above_median.median()
-        rank = (ships_above_median > ship_value).sum() + 1
-
-        rank = (ships_above_median > ship_value).sum() + 1
-
-        print(f"\nComparison for '{ship_row['Ship Name']}' ({stat}) at this level:")
-        print(f"Value: {ship_value}")
-        print(f"Mean of all ships above the median: {mean_val_of_ships_above_med:.1f}")
-        print(f"Median of all ships above the median: {median_val_of_ships_above_med:.1f}")
-        print(f"Rank: {rank} out of {len(ships_above_median)} ships")
+    print_comparison(get_comparison(ship_row, class_df, stats, "above_median"))
 
 def find_ship(ship_name: str, ship_level: str, ship_data: dict[str, pd.DataFrame]) -> Tuple[Optional[pd.Series], Optional[pd.DataFrame]]:
     """
@@ -397,43 +767,119 @@ def find_ship(ship_name: str, ship_level: str, ship_data: dict[str, pd.DataFrame
     """
     normalized = normalise_name(ship_name)
 
+    # data from load_ship_data comes with a prebuilt index, so this is a single dict lookup
+    if isinstance(ship_data, ShipData):
+        location = ship_data.name_index.get(normalized, {}).get(str(ship_level))
+        if location is None:
+            return None, None
+        key, position = location
+        df = ship_data[key]
+        return df.iloc[position], df
+
     for key, df in ship_data.items():
         # key looks like "CV_Level_100"
         if not key.endswith(f"Level_{ship_level}"):
             continue
 
-        matches = df[df["Ship Name"].apply(lambda x: normalise_name(x) == normalized)]
+        matches = df[df["Ship Name"].apply(lambda x: isinstance(x, str) and normalise_name(x) == normalized)]
         if not matches.empty:
             return matches.iloc[0], df  # Found the right ship in the right level
 
     return None, None
 
+def suggest_ships(ship_name: str, ship_data: dict, ship_level: Optional[str] = None, limit: int = 5) -> list[str]:
+    """
+    Names of ships close to ship_name (prefix or typo matches) for when find_ship finds nothing.
+    Only data from load_ship_data has a search index; for anything else there are no suggestions.
+    """
+    if not isinstance(ship_data, ShipData):
+        return []
+    return ship_data.search_index.suggest(normalise_name(ship_name), limit, ship_level)
+
+def search_ships(ship_data: dict) -> None:
+    """
+    Selected by user entering "3" in the main menu.
+    Asks for a query (see ship_query.py) and lists the ships matching it, until the user enters nothing.
+    """
+    import ship_query
+
+    print("\nSearch ships by stats.")
+    print("Separate each condition by commas, e.g. CL level 120, rarity Ultra Rare, anti-air > 400, sort by reload desc, limit 10")
+    print("Conditions: hulls (e.g. DD or DD|CL), level, rarity/nation/type/armor, stat comparisons (>, >=, <, <=, =, !=), sort by, limit")
+
+    while True:
+        query = str(input("\nQuery (leave empty to go back): ")).strip()
+        if not query:
+            return
+        try:
+            ship_query.print_results(ship_query.search(query, ship_data))
+        except ValueError as e:
+            print(f"{e}. Please try again.")
+
+def print_suggestions(ship_name: str, ship_data: dict, ship_level: str) -> None:
+    suggestions = suggest_ships(ship_name, ship_data, ship_level)
+    if suggestions:
+        print(f"Did you mean: {', '.join(suggestions)}?")
+
 AVERAGE_STATS_OPTIONS = {
     "1": ("Compare to mean/median of ships in the same class.", compare_to_all),
     "2": ("Compare to mean/median of ships in the same class with the same rarity.", compare_to_rarity),
     "3": ("Compare to mean/median of only ships in the same class above the median.", compare_to_above_median),
 }
 
-def compare_two_ships(first_ship: pd.Series, second_ship: pd.Series, selected_stats: list[str]) -> None:
+def get_two_ship_comparison(first_ship: pd.Series, second_ship: pd.Series, selected_stats: list[str]) -> TwoShipComparison:
+    """
+    The stat differences between two ships, without printing anything.
+    """
+    import pandas as pd
+
+    differences = []
     for stat in selected_stats:
         first_value = first_ship.get(stat)
         second_value = second_ship.get(stat)
 
-        # Handle missing values
         if pd.isna(first_value) or pd.isna(second_value):
-            print(f"\nStat '{stat}' is missing for one or both ships. Skipping comparison.")
+            difference = None
+        else:
+            difference = first_value - second_value
+        differences.append(StatDifference(stat, first_value, second_value, difference))
+
+    return TwoShipComparison(first_ship["Ship Name"], second_ship["Ship Name"], differences)
+
+def print_two_ship_comparison(result: TwoShipComparison) -> None:
+    first_name = result.first_name
+    second_name = result.second_name
+
+    for comparison in result.stats:
+        stat = comparison.stat
+
+        # Handle missing values
+        if comparison.difference is None:
+            print(f"\nStat '{stat}' is missing for one or both ships ({first_name}: {format_value(comparison.first_value)}, "
+                  f"{second_name}: {format_value(comparison.second_value)}). Skipping comparison.")
             continue
 
-        print(f"\nThe {stat} stat of {first_ship['Ship Name']} is {first_value}.")
-        print(f"The {stat} stat of {second_ship['Ship Name']} is {second_value}.")
+        print(f"\nThe {stat} stat of {first_name} is {comparison.first_value}.")
+        print(f"The {stat} stat of {second_name} is {comparison.second_value}.")
 
-        if first_value == second_value:
-            print(f"{first_ship['Ship Name']} and {second_ship['Ship Name']} have the same {stat} at this level.")
-        elif first_value > second_value:
-            print(f"{first_ship['Ship Name']} has a higher {stat} than {second_ship['Ship Name']} by {first_value - second_value} at this level.")
+        if comparison.first_value == comparison.second_value:
+            print(f"{first_name} and {second_name} have the same {stat} at this level.")
+        elif comparison.first_value > comparison.second_value:
+            print(f"{first_name} has a higher {stat} than {second_name} by {comparison.difference} at this level.")
         else:
-            print(f"{second_ship['Ship Name']} has a higher {stat} than {first_ship['Ship Name']} by {second_value - first_value} at this level.")
+            print(f"{second_name} has a higher {stat} than {first_name} by {comparison.second_value - comparison.first_value} at this level.")
+
+def compare_two_ships(first_ship: pd.Series, second_ship: pd.Series, selected_stats: list[str]) -> None:
+    print_two_ship_comparison(get_two_ship_comparison(first_ship, second_ship, selected_stats))
+
 
+if os.environ.get(PROFILE_ENV_VAR, "").strip().lower() not in PROFILE_OFF_VALUES:
+    import ship_profiling
+    try:
+        ship_profiling.enable(sys.modules[__name__], os.environ[PROFILE_ENV_VAR])
+    except ValueError as e:
+        # a bad value shouldn't stop every entry point from importing this module, just run without profiling
+        print(f"{PROFILE_ENV_VAR} ignored: {e}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,22 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import subprocess
+import sys
 
+DATA = 'C:\\Users\\simad\\OneDrive\\Desktop\\scraper\\ship_stats_data'
+
+# the exe can't keep a snapshot it builds itself (onefile extracts to a new folder every launch), so build it now
+subprocess.run([sys.executable, os.path.join(SPECPATH, 'ship_snapshot.py'), DATA], check=True)
 
 a = Analysis(
     ['al_stats_checker.py'],
     pathex=[],
     binaries=[],
-    datas=[('C:\\Users\\simad\\OneDrive\\Desktop\\scraper\\ship_stats_data', 'ship_stats_data'), ('C:\\Users\\simad\\AppData\\Roaming\\Python\\Python313\\site-packages\\pyfiglet', 'pyfiglet')],
+    datas=[
+        (os.path.join(DATA, '*.csv'), 'ship_stats_data'),
+        (os.path.join(DATA, 'ship_stats.snapshot'), 'ship_stats_data'),
+        (os.path.join(DATA, 'ship_names.manifest.json'), 'ship_stats_data'),
+    ],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,245 @@
+import sys
+import csv
+import json
+import math
+from typing import Iterable, Iterator, TextIO
+import pandas as pd
+import al_stats_checker as checker
+import ship_growth
+import ship_query
+import ship_similarity
+
+# Non-interactive query mode: reads one query per line (JSON lines or CSV) and writes one JSON result per line.
+# The ship data is loaded once and every query goes through the name index and the aggregate cache,
+# so nothing is rebuilt per query.
+#
+# JSON lines input, one object per line:
+#   {"op": "lookup", "ship": "laffey", "level": "125", "stats": ["reload", "torpedo"]}
+#   {"op": "compare", "mode": "rarity", "ship": "laffey", "level": "125", "stats": "all"}
+#   {"op": "compare_two", "ship": "laffey", "other": "javelin", "level": "120", "stats": "reload,torpedo"}
+#   {"op": "growth", "ship": "laffey", "level": 110, "stats": "reload"}
+#   {"op": "query", "query": "CL level 120, anti-air > 400, sort by reload, limit 10"}
+#   {"op": "similar", "ship": "laffey", "level": "125", "k": 5, "profile": "torpedo dd"}   or "weights": "torpedo:3,reload:2"
+# CSV input has a header row with the same field names (op, ship, level, stats, mode, other, id).
+#
+# "stats" is a list or a comma separated string of the names accepted in the interactive menus, defaulting to all.
+# "level" for growth is optional and can be any level from 1 to 125, the stats are estimated at it (see ship_growth.py).
+# "mode" is one of al_stats_checker.COMPARISON_MODES. An optional "id" is echoed back, otherwise the query's line number is used.
+
+def main() -> None:
+    args = sys.argv[1:]
+    if len(args) > 2 or (args and args[0] in ("-h", "--help")):
+        print("Usage: python batch_query.py [QUERY_FILE|-] [OUTPUT_FILE]")
+        print("Reads queries as JSON lines or CSV (from stdin if no file or '-' is given) and writes JSON lines.")
+        return
+    run_batch_file(args[0] if args else "-", args[1] if len(args) > 1 else None)
+
+
+def run_batch_file(query_path: str, output_path: str | None = None) -> None:
+    """
+    Load the ship data and answer every query in query_path ('-' for stdin),
+    writing the results to output_path (stdout if not given).
+    """
+    ship_data = checker.load_ship_data()
+
+    in_stream = sys.stdin if query_path == "-" else open(query_path, encoding="utf-8", newline="")
+    out_stream = sys.stdout if output_path is None else open(output_path, "w", encoding="utf-8")
+    try:
+        for result in run_batch(read_queries(in_stream), ship_data):
+            out_stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if in_stream is not sys.stdin:
+            in_stream.close()
+        if out_stream is not sys.stdout:
+            out_stream.close()
+
+
+def read_queries(stream: TextIO) -> Iterator[dict]:
+    """
+    Yields each query as a dict. The format is picked from the first non-blank line:
+    JSON lines if it starts with '{', otherwise CSV with a header row.
+    """
+    lines = (line for line in stream if line.strip())
+    first = next(lines, None)
+    if first is None:
+        return
+
+    if first.lstrip().startswith("{"):
+        yield _parse_json_line(first, 1)
+        for line_number, line in enumerate(lines, start=2):
+            yield _parse_json_line(line, line_number)
+    else:
+        reader = csv.DictReader(_chain(first, lines))
+        for line_number, row in enumerate(reader, start=1):
+            query = {field: value for field, value in row.items() if field and value not in (None, "")}
+            query.setdefault("id", line_number)
+            yield query
+
+
+def run_batch(queries: Iterable[dict], ship_data: dict) -> Iterator[dict]:
+    """
+    Answer each query in turn. A bad query produces an error result instead of stopping the batch.
+    """
+    for query in queries:
+        try:
+            yield answer_query(query, ship_data)
+        except (KeyError, ValueError) as e:
+            yield error_result(e, query.get("id"))
+
+
+def answer_query(query: dict, ship_data: dict) -> dict:
+    if "error" in query:
+        return query
+
+    op = query.get("op", "lookup")
+    if op == "query":
+        ships = ship_query.search(str(query.get("query", "")), ship_data)
+        return {"id": query.get("id"), "op": op, "query": query.get("query"),
+                "results": [{column: _json_value(value) for column, value in row.items()} for row in ships.to_dict("records")]}
+
+    stats = checker.parse_stats(query.get("stats", "all"))
+    if op == "growth":
+        return _answer_growth(query, stats, ship_data)
+
+    level = str(query.get("level", ""))
+    if level not in checker.VALID_LEVELS:
+        raise ValueError(f"level must be one of {', '.join(checker.VALID_LEVELS)}")
+
+    ship_row, class_df = _find(query.get("ship", ""), level, ship_data)
+    result = {"id": query.get("id"), "op": op, "ship": ship_row["Ship Name"], "level": level}
+
+    if op == "lookup":
+        result["stats"] = {stat: _json_value(ship_row[stat]) for stat in stats}
+
+    elif op == "compare":
+        comparison = checker.get_comparison(ship_row, class_df, stats, query.get("mode", "all"))
+        result["mode"] = comparison.mode
+        result["results"] = [
+            {
+                "stat": stat.stat,
+                "value": _json_value(stat.value),
+                "mean": _json_value(stat.mean),
+                "median": _json_value(stat.median),
+                "rank": stat.rank,
+                "count": stat.count,
+            }
+            for stat in comparison.stats
+        ]
+
+    elif op == "compare_two":
+        other_row, other_df = _find(query.get("other", ""), level, ship_data)
+        result["other"] = other_row["Ship Name"]
+        result["same_class"] = class_df is other_df
+        result["results"] = [
+            {
+                "stat": stat.stat,
+                "value": _json_value(stat.first_value),
+                "other_value": _json_value(stat.second_value),
+                "difference": _json_value(stat.difference),
+            }
+            for stat in checker.get_two_ship_comparison(ship_row, other_row, stats).stats
+        ]
+
+    elif op == "similar":
+        weights = ship_similarity.parse_weights(query.get("profile"), query.get("weights"))
+        try:
+            k = int(query.get("k", 5))
+        except (TypeError, ValueError):
+            raise ValueError("k must be a whole number") from None
+        result["score"] = ship_similarity.ship_score(ship_row, class_df, weights)
+        result["results"] = [
+            {"ship": ship.ship_name, "distance": ship.distance, "score": ship.score}
+            for ship in ship_similarity.similar_ships(ship_row, class_df, weights, k)
+        ]
+
+    else:
+        raise ValueError(f"unknown op '{op}', expected lookup, compare, compare_two, growth, query or similar")
+
+    return result
+
+
+def _answer_growth(query: dict, stats: list[str], ship_data: dict) -> dict:
+    level = query.get("level")
+    if level in (None, ""):
+        level = None
+    else:
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            raise ValueError("level must be a whole number") from None
+
+    # every ship is in the highest level table, which is what the growth table is built from
+    ship_row, class_df = _find(query.get("ship", ""), checker.VALID_LEVELS[-1], ship_data)
+    table = ship_growth.growth_table(ship_data, ship_growth.hull_of(class_df, ship_data), stats)
+    position = table.position(ship_row["ID"])
+    values = table.values[position]
+    estimate = table.estimate(level)[position, 0] if level is not None else None
+
+    result = {"id": query.get("id"), "op": "growth", "ship": ship_row["Ship Name"], "level": level}
+    result["results"] = [
+        {
+            "stat": stat,
+            "values": {str(known): _json_value(values[j, s]) for j, known in enumerate(ship_growth.GROWTH_LEVELS)},
+            "estimate": None if estimate is None else _json_value(estimate[s]),
+        }
+        for s, stat in enumerate(stats)
+    ]
+    return result
+
+
+def error_result(error: Exception, query_id=None) -> dict:
+    """
+    The result written for a query that failed, with ship suggestions if the error was an unknown ship.
+    """
+    # str() of a KeyError is the repr of its argument, quotes included
+    message = str(error.args[0]) if isinstance(error, KeyError) and error.args else str(error)
+    result = {"id": query_id, "error": message}
+    if isinstance(error, ShipNotFoundError):
+        result["suggestions"] = error.suggestions
+    return result
+
+
+class ShipNotFoundError(ValueError):
+    def __init__(self, ship_name: str, level: str, suggestions: list[str]) -> None:
+        super().__init__(f"ship '{ship_name}' not found at level {level}")
+        self.suggestions = suggestions
+
+
+def _find(ship_name: str, level: str, ship_data: dict):
+    ship_row, class_df = checker.find_ship(str(ship_name), level, ship_data)
+    if ship_row is None:
+        raise ShipNotFoundError(ship_name, level, checker.suggest_ships(str(ship_name), ship_data, level))
+    return ship_row, class_df
+
+
+def _parse_json_line(line: str, line_number: int) -> dict:
+    try:
+        query = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"id": line_number, "error": f"invalid JSON: {e}"}
+    if not isinstance(query, dict):
+        return {"id": line_number, "error": "each line must be a JSON object"}
+    query.setdefault("id", line_number)
+    return query
+
+
+def _chain(first: str, rest: Iterable[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def _json_value(value):
+    """
+    numpy/pandas scalars to plain python for json, with missing values as null
+    """
+    if value is None or value is pd.NA:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+if __name__ == "__main__":
+    main()
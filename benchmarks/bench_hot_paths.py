@@ -0,0 +1,188 @@
+import io
+import os
+import sys
+import json
+import shutil
+import timeit
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import pandas as pd
+
+# Benchmark suite for the hot paths of al_stats_checker: loading, name normalisation, find_ship,
+# the AVERAGE_STATS_OPTIONS comparisons and compare_two_ships.
+# Each benchmark runs on the real data and on copies of it scaled up synthetically (every table repeated
+# with renamed ships), and the results are written as JSON so two runs can be compared.
+#
+#   python benchmarks/bench_hot_paths.py --output before.json
+#   python benchmarks/bench_hot_paths.py --output after.json --compare before.json
+#
+# --compare prints the change for every benchmark and exits with status 1 if any got slower than --threshold.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import al_stats_checker as checker
+
+DEFAULT_SCALES = [1, 10, 100]
+LEVEL = "125"
+STATS = [col for col in checker.VALID_STATS.values() if col != "all"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the load, lookup and comparison hot paths")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="comma separated dataset scale factors (default: 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark, the best and median are kept")
+    parser.add_argument("--output", help="write the results as JSON to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression (default: 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "benchmarks": run_suite(scales, args.repeat),
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare_results(baseline, results, args.threshold):
+            sys.exit(1)
+
+
+def run_suite(scales: list[int], repeat: int) -> list[dict]:
+    source_folder = checker.resource_path("ship_stats_data")
+    results = []
+
+    names = [name for df in checker.load_ship_data_from_csv(source_folder).values() for name in df["Ship Name"] if isinstance(name, str)]
+    # the cache is cleared on every pass, so the times stay comparable with results from before normalise_name was cached
+    results.append(bench("normalise_name", 1, lambda: [checker.normalise_name.cache_clear(), [checker.normalise_name(name) for name in names]],
+                         repeat, per=len(names)))
+    results.append(bench("strip_accents", 1, lambda: [checker.strip_accents(name) for name in names], repeat, per=len(names)))
+
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as data_folder:
+            if scale == 1:
+                for filename in os.listdir(source_folder):
+                    if filename.endswith(".csv"):
+                        shutil.copy(os.path.join(source_folder, filename), data_folder)
+            else:
+                write_scaled_data(source_folder, data_folder, scale)
+            _log(f"scale {scale}x: {data_folder}")
+            results.extend(run_scale(data_folder, scale, repeat))
+    return results
+
+
+def run_scale(data_folder: str, scale: int, repeat: int) -> list[dict]:
+    results = []
+    snapshot = os.path.join(data_folder, "ship_stats.snapshot")
+
+    def load_from_csv() -> None:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+        checker.load_ship_data(data_folder)
+
+    results.append(bench("load_ship_data (csv, rebuilds snapshot)", scale, load_from_csv, repeat))
+    results.append(bench("load_ship_data (snapshot)", scale, lambda: checker.load_ship_data(data_folder), repeat))
+    results.append(bench("load_ship_data_from_csv", scale, lambda: checker.load_ship_data_from_csv(data_folder), repeat))
+
+    ship_data = checker.load_ship_data(data_folder)
+    keys = [key for key in ship_data if key.endswith(f"Level_{LEVEL}")]
+    first_name = ship_data[keys[0]]["Ship Name"].iloc[0]
+    last_name = ship_data[keys[-1]]["Ship Name"].iloc[-1]
+    results.append(bench("find_ship (hit, first table)", scale, lambda: checker.find_ship(first_name, LEVEL, ship_data), repeat))
+    results.append(bench("find_ship (hit, last table)", scale, lambda: checker.find_ship(last_name, LEVEL, ship_data), repeat))
+    results.append(bench("find_ship (miss)", scale, lambda: checker.find_ship("not a ship", LEVEL, ship_data), repeat))
+
+    ship_row, class_df = checker.find_ship(last_name, LEVEL, ship_data)
+    other_row, _ = checker.find_ship(first_name, LEVEL, ship_data)
+    for key, (_, func) in checker.AVERAGE_STATS_OPTIONS.items():
+        results.append(bench(f"{func.__name__} (all stats)", scale, _quiet(lambda func=func: func(ship_row, class_df, STATS)), repeat))
+        # uncached cost: what the first query against a freshly loaded table pays
+        results.append(bench(f"{func.__name__} (all stats, cold cache)", scale,
+                             _quiet(lambda func=func: (checker.aggregate_cache().clear(), func(ship_row, class_df, STATS))), repeat))
+    results.append(bench("compare_two_ships (all stats)", scale, _quiet(lambda: checker.compare_two_ships(ship_row, other_row, STATS)), repeat))
+    return results
+
+
+def bench(name: str, scale: int, func, repeat: int, per: int = 1) -> dict:
+    """
+    Times func with timeit: the loop count is picked so one repeat takes at least 0.2s.
+    Times are in microseconds per call (or per item, with per).
+    """
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    times = sorted(t / loops / per * 1e6 for t in timer.repeat(repeat=repeat, number=loops))
+    result = {"name": name, "scale": scale, "loops": loops, "best_us": times[0], "median_us": times[len(times) // 2]}
+    _log(f"  {name:<48} {scale:>4}x {result['best_us']:14.2f} us")
+    return result
+
+
+def write_scaled_data(source_folder: str, data_folder: str, scale: int) -> None:
+    """
+    Copies every table `scale` times into one, renaming the copies (e.g. "Laffey #7") so names stay unique.
+    The suffix isn't a bare number, as normalise_name would turn " 2" into "ii" and "Laffey 2" would be Laffey II.
+    """
+    for key, df in checker.load_ship_data_from_csv(source_folder).items():
+        copies = []
+        for copy in range(scale):
+            scaled = df.copy()
+            if copy:
+                scaled["Ship Name"] = scaled["Ship Name"] + f" #{copy}"
+            copies.append(scaled)
+        pd.concat(copies, ignore_index=True).to_csv(os.path.join(data_folder, f"{key}.csv"), index=False)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Prints each benchmark's change against the baseline. Returns False if any slowed down by more than threshold.
+    """
+    before = {(result["name"], result["scale"]): result["best_us"] for result in baseline["benchmarks"]}
+    ok = True
+    print(f"\nCompared to {baseline.get('commit') or 'baseline'}:", file=sys.stderr)
+    for result in current["benchmarks"]:
+        key = (result["name"], result["scale"])
+        if key not in before:
+            continue
+        change = result["best_us"] / before[key] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {result['name']:<48} {result['scale']:>4}x {change:+8.1%}{flag}", file=sys.stderr)
+    return ok
+
+
+def _quiet(func):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return run
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _log(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
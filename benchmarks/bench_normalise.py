@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import random
+import unicodedata
+
+# normalise_name micro-benchmark: the cached, table-driven version against the original implementation
+# (kept below as the reference) on every ship name in the data, checking both give the same names.
+#
+#   python benchmarks/bench_normalise.py [--repeat N]
+#
+# "cold" clears the cache before each pass, so it measures the ascii fast path and translation tables alone,
+# "warm" is what repeated lookups and the name index build see.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import al_stats_checker as checker
+
+
+def main() -> None:
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 20
+
+    ship_data = checker.load_ship_data_from_csv(checker.resource_path("ship_stats_data"))
+    # every name as find_ship and the name index see them: once per table it is in
+    names = [name for df in ship_data.values() for name in df["Ship Name"] if isinstance(name, str)]
+    # what users type: mixed case, numerals, "retrofit", no accents
+    queries = [_as_typed(name) for name in names]
+    print(f"{len(names)} names ({len(set(names))} distinct, {sum(not name.isascii() for name in names)} non-ascii)")
+
+    for label, corpus in (("data names", names), ("typed queries", queries)):
+        mismatches = [name for name in corpus if checker.normalise_name(name) != original_normalise_name(name)]
+        if mismatches:
+            sys.exit(f"{label}: {len(mismatches)} names normalised differently, e.g. {mismatches[0]!r}")
+
+        original = _best(lambda: [original_normalise_name(name) for name in corpus], repeat)
+        cold = _best(lambda: [checker.normalise_name.cache_clear(), [checker.normalise_name(name) for name in corpus]], repeat)
+        warm = _best(lambda: [checker.normalise_name(name) for name in corpus], repeat)
+        print(f"\n{label}:")
+        print(f"  original:        {original / len(corpus) * 1e9:8.0f} ns/name")
+        print(f"  new, cold cache: {cold / len(corpus) * 1e9:8.0f} ns/name  ({original / cold:5.1f}x)")
+        print(f"  new, warm cache: {warm / len(corpus) * 1e9:8.0f} ns/name  ({original / warm:5.1f}x)")
+
+
+def original_normalise_name(name: str) -> str:
+    name = name.lower().strip()
+    name = original_strip_accents(name)
+    name = name.replace("ß", "ss")
+
+    if "retrofit" in name and "(retrofit)" not in name:
+        name = name.replace("retrofit", "").strip() + " (retrofit)"
+
+    for k, v in checker.SYMBOLS.items():
+        name = name.replace(v, k)
+
+    for k, v in checker.ROMAN_MAP.items():
+        if name.endswith(" " + v):
+            name = name.replace(" " + v, " " + k)
+
+    return name
+
+
+def original_strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize('NFD', text)
+    filtered_chars = []
+
+    for c in decomposed:
+        if unicodedata.category(c) != 'Mn':
+            filtered_chars.append(c)
+
+    return ''.join(filtered_chars)
+
+
+def _best(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _as_typed(name: str) -> str:
+    random.seed(name)
+    name = original_strip_accents(name).replace("ß", "ss").replace("µ", "muse")
+    name = name.replace(" II", " 2").replace("(Retrofit)", "retrofit")
+    return "".join(c.upper() if random.random() < 0.2 else c.lower() for c in name)
+
+
+if __name__ == "__main__":
+    main()
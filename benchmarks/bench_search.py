@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import random
+
+# Ship name search benchmark: suggestions from the search index against the scan-based lookup
+# find_ship falls back to for plain dicts (one normalise_name per ship per table).
+#
+#   python benchmarks/bench_search.py [--queries N]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import al_stats_checker as checker
+
+
+def main() -> None:
+    count = int(sys.argv[sys.argv.index("--queries") + 1]) if "--queries" in sys.argv else 300
+
+    ship_data = checker.load_ship_data()
+    plain_data = dict(ship_data)  # no index, so find_ship scans every table
+    names = sorted({name for df in ship_data.values() for name in df["Ship Name"] if isinstance(name, str)})
+
+    random.seed(0)
+    exact = [random.choice(names) for _ in range(count)]
+    prefixes = [name[:max(3, len(name) // 2)] for name in exact]
+    typos = [_typo(name) for name in exact]
+
+    start = time.perf_counter()
+    built = checker.ShipData(ship_data)
+    built.build_name_index()
+    built.search_index  # built on first use
+    print(f"build name + search index:        {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    _report("scan find_ship (exact)", exact, lambda name: checker.find_ship(name, "125", plain_data))
+    _report("scan find_ship (typo, miss)", typos, lambda name: checker.find_ship(name, "125", plain_data))
+    _report("indexed find_ship (exact)", exact, lambda name: checker.find_ship(name, "125", ship_data))
+    _report("suggest (prefix)", prefixes, lambda name: checker.suggest_ships(name, ship_data, "125"))
+    _report("suggest (typo)", typos, lambda name: checker.suggest_ships(name, ship_data, "125"))
+
+    found = sum(original in checker.suggest_ships(typo, ship_data, "125") for original, typo in zip(exact, typos))
+    print(f"typo queries with the intended ship suggested: {found}/{count}")
+
+
+def _report(label: str, queries: list[str], func) -> None:
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    per_query = (time.perf_counter() - start) / len(queries)
+    print(f"{label + ':':<34}{per_query * 1e6:10.1f} us/query")
+
+
+def _typo(name: str) -> str:
+    """
+    One random edit: drop, swap or replace a character.
+    """
+    name = name.lower()
+    i = random.randrange(len(name))
+    edit = random.choice(["drop", "swap", "replace"])
+    if edit == "drop" or len(name) < 2:
+        return name[:i] + name[i + 1:]
+    if edit == "swap":
+        i = min(i, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + random.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:]
+
+
+if __name__ == "__main__":
+    main()
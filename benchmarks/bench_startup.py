@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# Start up time budget check: how long until the main menu is shown, and until the first lookup is answered
+# (which waits for the data loaded in the background), for
+#   source   python al_stats_checker.py from the repository
+#   onefile  the layout of the pyinstaller onefile exe: the modules and ship_stats_data extracted to a temporary folder
+#            that sys._MEIPASS points to (what resource_path handles), run from a different working directory.
+#            The data is what al_stats_checker.spec bundles: the csv files plus a snapshot and manifest built from them,
+#            copied with new file times like a real extraction
+#   onefile (no snapshot)  the same with only the csv files, what every launch pays if the snapshot isn't bundled
+#   exe      a built executable, with --exe PATH
+# Each is run --runs times and the best time is compared to the budget; exits with status 1 if any is over it.
+#
+#   python benchmarks/bench_startup.py [--budget 0.25] [--exe dist/al_stats_checker.exe]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"Choose an option by typing the corresponding number: "
+# the session run after the menu appears: look up one ship, then exit
+LOOKUP = b"1\nlaffey\n125\nreload\n1\n2\n4\n"
+LOOKUP_DONE = b"1. Make another comparison"
+DEFAULT_BUDGET = 0.25
+# every module of the repository, whatever al_stats_checker ends up importing
+MODULES = sorted(filename for filename in os.listdir(REPO_ROOT) if filename.endswith(".py"))
+
+# what the onefile bootloader sets up before running the script
+ONEFILE_BOOTSTRAP = """
+import sys, runpy
+bundle = sys.argv.pop(1)
+sys.frozen = True
+sys._MEIPASS = bundle
+sys.path.insert(0, bundle)
+runpy.run_path(bundle + '/al_stats_checker.py', run_name='__main__')
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the time until the menu is shown against a budget")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help=f"seconds allowed until the menu is shown (default: {DEFAULT_BUDGET})")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="also time a built executable")
+    args = parser.parse_args()
+
+    layouts = [("source", [sys.executable, os.path.join(REPO_ROOT, "al_stats_checker.py")], REPO_ROOT)]
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = os.path.join(tmp, "_MEI")
+        make_onefile_layout(bundle, os.path.join(tmp, "build"), snapshot=True)
+        bare_bundle = os.path.join(tmp, "_MEI_bare")
+        make_onefile_layout(bare_bundle, os.path.join(tmp, "build_bare"), snapshot=False)
+        workdir = os.path.join(tmp, "cwd")
+        os.makedirs(workdir)
+        layouts.append(("onefile", [sys.executable, "-c", ONEFILE_BOOTSTRAP, bundle], workdir))
+        layouts.append(("onefile (no snapshot)", [sys.executable, "-c", ONEFILE_BOOTSTRAP, bare_bundle], workdir))
+        if args.exe:
+            layouts.append(("exe", [os.path.abspath(args.exe)], workdir))
+
+        ok = True
+        print(f"{'layout':<22}{'menu (best)':>14}{'menu (median)':>16}{'first lookup':>15}")
+        for label, command, cwd in layouts:
+            times = sorted(time_startup(command, cwd) for _ in range(args.runs))
+            menu = [t[0] for t in times]
+            flag = ""
+            if menu[0] > args.budget:
+                flag = f"  OVER BUDGET ({args.budget:.3f}s)"
+                ok = False
+            print(f"{label:<22}{menu[0]:>13.3f}s{menu[len(menu) // 2]:>15.3f}s{times[0][1]:>14.3f}s{flag}")
+    if not ok:
+        sys.exit(1)
+
+
+def time_startup(command: list[str], cwd: str) -> tuple[float, float]:
+    """
+    Seconds from starting the process to the menu prompt, and to the answer of the first lookup.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               env={**os.environ, "PYTHONUNBUFFERED": "1"})
+    try:
+        _read_until(process, PROMPT)
+        menu = time.perf_counter() - start
+        process.stdin.write(LOOKUP)
+        process.stdin.flush()
+        _read_until(process, LOOKUP_DONE)
+        lookup = time.perf_counter() - start
+        process.stdin.close()
+        process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return menu, lookup
+
+
+def make_onefile_layout(bundle: str, build: str, snapshot: bool) -> None:
+    """
+    What the onefile exe extracts: the modules at the top level and the ship_stats_data folder next to them.
+    The data is prepared in `build` the way al_stats_checker.spec does it, then copied without keeping file times.
+    """
+    source_data = os.path.join(REPO_ROOT, "ship_stats_data")
+    build_data = os.path.join(build, "ship_stats_data")
+    os.makedirs(build_data)
+    for filename in os.listdir(source_data):
+        if filename.endswith(".csv"):
+            shutil.copy(os.path.join(source_data, filename), build_data)
+    if snapshot:
+        subprocess.run([sys.executable, os.path.join(REPO_ROOT, "ship_snapshot.py"), build_data], check=True, stdout=subprocess.DEVNULL)
+
+    os.makedirs(os.path.join(bundle, "ship_stats_data"))
+    for module in MODULES:
+        shutil.copy(os.path.join(REPO_ROOT, module), bundle)
+    for filename in os.listdir(build_data):
+        shutil.copy(os.path.join(build_data, filename), os.path.join(bundle, "ship_stats_data"))
+
+
+def _read_until(process: subprocess.Popen, marker: bytes) -> None:
+    output = b""
+    while marker not in output:
+        chunk = process.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError(f"process exited before printing {marker!r}: {output[-500:]!r}")
+        output += chunk
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import ship_selenium_scraper as scraper
+
+# Offline check of the scraper pipeline against a small saved page, no browser or network needed.
+# fixtures/ship_stats_page.html has every hull section (wrapped in the mw-heading div like the wiki) with the
+# Level_1 and Level_100 tabs and two ships each, plus a blank retrofit row in DD_Level_1. Checked:
+#   parse_page in this process finds every hull and level, with the same tables as parsing in a process pool
+#   scrape_to_folder writes every table once, a second run over the same page rewrites nothing,
+#   and after one cell of the page is edited only the file containing it is rewritten
+#   a stat that isn't a number in the last table fails the scrape before any file is written, even ones that changed
+# Exits with status 1 if anything doesn't hold.
+#
+#   python benchmarks/check_scraper.py
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ship_stats_page.html")
+LEVELS = ["Level_1", "Level_100"]
+# the cell edited for the last check: the luck of the first ship on the page, which is in the DD level 1 table
+EDIT = ("<td>001</td><td>Universal Bulin</td><td>Elite</td><td>Universal</td><td>DD</td><td>100</td>",
+        "<td>001</td><td>Universal Bulin</td><td>Elite</td><td>Universal</td><td>DD</td><td>99</td>")
+EDITED_FILE = "DD_Level_1.csv"
+# the speed (the stat after armor) of the last ship on the page, which is in the IX level 100 table
+BAD_CELL = ("<td>Light</td><td>", "<td>Light</td><td>abc")
+
+
+def main() -> None:
+    with open(FIXTURE, encoding="utf-8") as f:
+        page_source = f.read()
+
+    failures = []
+    tables = scraper.parse_page(page_source, workers=0)
+    for ship_class in scraper.SHIP_CLASSES:
+        levels = list(tables.get(ship_class, {}))
+        if levels != LEVELS:
+            failures.append(f"{ship_class}: levels {levels}, expected {LEVELS}")
+        elif any(df.empty for df in tables[ship_class].values()):
+            failures.append(f"{ship_class}: empty table")
+
+    pooled = scraper.parse_page(page_source, workers=2)
+    if any(not pooled[c][level].equals(df) for c, levels in tables.items() for level, df in levels.items()):
+        failures.append("parsing in a process pool gives different tables")
+
+    with tempfile.TemporaryDirectory() as folder:
+        expected = [f"{scraper.SHIP_CLASS_MAP[c]}_{level}.csv" for c in scraper.SHIP_CLASSES for level in LEVELS]
+        written = scraper.scrape_to_folder(page_source, folder, workers=0)
+        if sorted(written) != sorted(expected):
+            failures.append(f"first run wrote {written}, expected every table")
+
+        written = scraper.scrape_to_folder(page_source, folder, workers=0)
+        if written:
+            failures.append(f"second run over the same page rewrote {written}")
+
+        if EDIT[0] not in page_source:
+            failures.append("the cell to edit isn't in the page")
+        else:
+            written = scraper.scrape_to_folder(page_source.replace(EDIT[0], EDIT[1], 1), folder, workers=0)
+            if written != [EDITED_FILE]:
+                failures.append(f"editing one cell rewrote {written}, expected [{EDITED_FILE!r}]")
+
+            with open(os.path.join(folder, EDITED_FILE), "rb") as f:
+                edited = f.read()
+            # the edit is undone too, so the DD table would be rewritten if anything was
+            position = page_source.rfind(BAD_CELL[0])
+            bad_page = page_source[:position] + BAD_CELL[1] + page_source[position + len(BAD_CELL[0]):]
+            try:
+                written = scraper.scrape_to_folder(bad_page, folder, workers=0)
+                failures.append(f"a stat that isn't a number was written to {written}")
+            except ValueError:
+                pass
+            with open(os.path.join(folder, EDITED_FILE), "rb") as f:
+                if f.read() != edited:
+                    failures.append(f"{EDITED_FILE} was rewritten by a scrape that failed")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"ok: {len(scraper.SHIP_CLASSES)} sections x {len(LEVELS)} levels parsed, unchanged tables not rewritten, bad values not written")
+
+
+if __name__ == "__main__":
+    main()
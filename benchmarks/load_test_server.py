@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import urlencode
+
+# Load test for ship_server.py: runs concurrent keep-alive clients against a local instance
+# and reports requests per second and p50/p99 latency.
+#
+#   python benchmarks/load_test_server.py --start               start a server on --port, test it, stop it
+#   python benchmarks/load_test_server.py --port 8080           test a server that is already running
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SHIPS = ["laffey", "javelin", "z23", "ayanami", "cleveland", "belfast", "helena", "roon muse", "prinz eugen",
+         "hood", "bismarck", "enterprise", "akagi", "i-19", "akashi", "lutzow", "houston ii", "cassin retrofit"]
+LEVELS = ["100", "120", "125"]
+STATS = ["all", "reload,torpedo", "firepower,anti-air", "health,evasion,speed"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the ship stats HTTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--start", action="store_true", help="start a server for the duration of the test")
+    parser.add_argument("--connections", type=int, default=32, help="concurrent client connections")
+    parser.add_argument("--requests", type=int, default=20000, help="total requests to send")
+    parser.add_argument("--distinct", type=int, default=500, help="number of distinct queries to draw from")
+    args = parser.parse_args()
+
+    server = None
+    if args.start:
+        server = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, "ship_server.py"), "--host", args.host, "--port", str(args.port)],
+                                  stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()  # "Serving ship stats on ..." once the data is loaded
+
+    try:
+        latencies, elapsed, errors = asyncio.run(run_load(args.host, args.port, args.connections, args.requests, make_targets(args.distinct)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"requests:    {len(latencies)} ({errors} non-200)")
+    print(f"connections: {args.connections}")
+    print(f"throughput:  {len(latencies) / elapsed:.0f} requests/s")
+    print(f"p50 latency: {percentile(latencies, 50) * 1000:.3f} ms")
+    print(f"p99 latency: {percentile(latencies, 99) * 1000:.3f} ms")
+
+
+def make_targets(count: int) -> list[str]:
+    random.seed(0)
+    targets = []
+    for _ in range(count):
+        params = {"ship": random.choice(SHIPS), "level": random.choice(LEVELS), "stats": random.choice(STATS)}
+        endpoint = random.choice(["lookup", "compare", "compare_two"])
+        if endpoint == "compare":
+            params["mode"] = random.choice(["all", "rarity", "above_median"])
+        elif endpoint == "compare_two":
+            params["other"] = random.choice(SHIPS)
+        targets.append(f"/{endpoint}?{urlencode(params)}")
+    return targets
+
+
+async def run_load(host: str, port: int, connections: int, total: int, targets: list[str]) -> tuple[list[float], float, int]:
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def client() -> None:
+        nonlocal remaining, errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                target = random.choice(targets)
+                start = time.perf_counter()
+                writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return latencies, time.perf_counter() - start, errors
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import sys
+import argparse
+from typing import Optional
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+
+# Stat growth across the four level tables. The same ship appears in each of {hull}_Level_1/100/120/125,
+# so the tables are joined on ship ID into one (ships, levels, stats) array. Growth between levels and
+# estimates for any level in between (linear between the known levels) are then computed for the whole class at once.
+#
+#   python ship_growth.py DD --stats reload,torpedo                   stats at every known level plus growth
+#   python ship_growth.py DD --stats reload,torpedo --level 110       estimated stats at level 110
+#   python ship_growth.py --ship laffey --level 90,110                just one ship
+
+GROWTH_LEVELS = np.array([int(level) for level in checker.VALID_LEVELS])
+
+
+class GrowthTable:
+    """
+    One hull's ships joined across the level tables. values[i, j, s] is stat s of ship i at GROWTH_LEVELS[j],
+    NaN where the ship has no value at that level (e.g. retrofits at level 1).
+    Ships are the ones in the highest level table, in its order.
+    """
+    __slots__ = ("hull", "ids", "names", "stats", "values", "_positions")
+
+    def __init__(self, hull: str, ids: np.ndarray, names: np.ndarray, stats: list[str], values: np.ndarray) -> None:
+        self.hull = hull
+        self.ids = ids
+        self.names = names
+        self.stats = stats
+        self.values = values
+        self._positions = {ship_id: i for i, ship_id in enumerate(ids)}
+
+    def growth(self) -> np.ndarray:
+        """
+        (ships, levels - 1, stats): how much each stat grows from each known level to the next.
+        """
+        return np.diff(self.values, axis=1)
+
+    def estimate(self, levels) -> np.ndarray:
+        """
+        (ships, len(levels), stats) stats at the given levels, interpolated linearly between the known levels.
+        Levels must be between the lowest and highest known level.
+        """
+        levels = np.atleast_1d(np.asarray(levels, dtype=np.float64))
+        if np.any(levels < GROWTH_LEVELS[0]) or np.any(levels > GROWTH_LEVELS[-1]):
+            raise ValueError(f"level must be between {GROWTH_LEVELS[0]} and {GROWTH_LEVELS[-1]}")
+
+        # segment j covers GROWTH_LEVELS[j] to GROWTH_LEVELS[j + 1]
+        segment = np.clip(np.searchsorted(GROWTH_LEVELS, levels, side="right") - 1, 0, len(GROWTH_LEVELS) - 2)
+        start = GROWTH_LEVELS[segment]
+        t = ((levels - start) / (GROWTH_LEVELS[segment + 1] - start))[None, :, None]
+        lower = self.values[:, segment, :]
+        upper = self.values[:, segment + 1, :]
+        return lower + t * (upper - lower)
+
+    def position(self, ship_id: str) -> Optional[int]:
+        return self._positions.get(ship_id)
+
+    def to_frame(self, levels=None) -> pd.DataFrame:
+        """
+        One row per ship with a "{stat} @{level}" column per stat and level,
+        the known levels if levels isn't given, otherwise the estimates at those levels.
+        """
+        if levels is None:
+            levels, values = GROWTH_LEVELS, self.values
+        else:
+            levels = np.atleast_1d(levels)
+            values = self.estimate(levels)
+
+        columns = {"ID": self.ids, "Ship Name": self.names}
+        for s, stat in enumerate(self.stats):
+            for j, level in enumerate(levels):
+                columns[f"{stat} @{level:g}"] = values[:, j, s]
+        return pd.DataFrame(columns)
+
+
+def growth_table(ship_data: dict, hull: str, stats: list[str]) -> GrowthTable:
+    """
+    Joins the hull's four level tables on ship ID.
+    """
+    hull = hull.upper()
+    keys = [f"{hull}_Level_{level}" for level in checker.VALID_LEVELS]
+    missing = [key for key in keys if key not in ship_data]
+    if missing:
+        raise ValueError(f"no table {', '.join(missing)}")
+    tables = [ship_data[key] for key in keys]
+    last = tables[-1]
+    ids = last["ID"].to_numpy(dtype=object)
+
+    values = np.full((len(last), len(tables), len(stats)), np.nan)
+    for j, df in enumerate(tables):
+        # blank rows (retrofits in the level 1 tables) have no ID and can't be joined
+        df = df[df["ID"].notna()]
+        # row of each ship in this table, -1 if it isn't there
+        rows = pd.Index(df["ID"]).get_indexer(ids)
+        found = rows >= 0
+        values[found, j, :] = df[stats].to_numpy(dtype=np.float64, na_value=np.nan)[rows[found]]
+
+    return GrowthTable(hull, ids, last["Ship Name"].to_numpy(dtype=object), list(stats), values)
+
+
+def find_ship_growth(ship_name: str, ship_data: dict, stats: list[str]) -> tuple[GrowthTable, int]:
+    """
+    The growth table of the ship's hull and the ship's row in it.
+    Raises ValueError if the ship isn't found.
+    """
+    for level in reversed(checker.VALID_LEVELS):
+        ship_row, class_df = checker.find_ship(ship_name, level, ship_data)
+        if ship_row is None:
+            continue
+        table = growth_table(ship_data, hull_of(class_df, ship_data), stats)
+        position = table.position(ship_row["ID"])
+        if position is not None:
+            return table, position
+    raise ValueError(f"ship '{ship_name}' not found")
+
+
+def hull_of(class_df: pd.DataFrame, ship_data: dict) -> str:
+    """
+    The hull shorthand of a table find_ship returned.
+    """
+    # only look through tables that are already loaded, the one find_ship returned is one of them
+    keys = ship_data.loaded_keys() if isinstance(ship_data, checker.ShipData) else list(ship_data)
+    key = next(key for key in keys if ship_data[key] is class_df)
+    return key.split("_Level_")[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stat growth across levels for a hull class")
+    parser.add_argument("hull", nargs="?", help="hull shorthand as in the data file names, e.g. DD, CL, BB (not needed with --ship)")
+    parser.add_argument("--stats", default="all", help="comma separated stats (default: all)")
+    parser.add_argument("--level", help="comma separated levels to estimate stats at, e.g. 90,110")
+    parser.add_argument("--ship", help="only show this ship")
+    parser.add_argument("--out", help="write csv to this file instead of printing")
+    args = parser.parse_args()
+
+    ship_data = checker.load_ship_data()
+    stats = checker.parse_stats(args.stats)
+    levels = [float(level) for level in args.level.split(",")] if args.level else None
+
+    if args.ship:
+        table, position = find_ship_growth(args.ship, ship_data, stats)
+        frame = table.to_frame(levels).iloc[[position]]
+    elif args.hull:
+        frame = growth_table(ship_data, args.hull, stats).to_frame(levels)
+    else:
+        parser.error("give a hull or --ship")
+
+    if args.out:
+        frame.to_csv(args.out, index=False)
+    else:
+        print(frame.to_string(index=False))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValueError as e:
+        sys.exit(str(e))
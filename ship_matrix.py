@@ -0,0 +1,145 @@
+import sys
+import argparse
+from typing import Iterator, TextIO
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+
+# Whole-class comparisons: every ship of one hull x level table against every other, plus per-stat leaderboards.
+# Everything is computed as NumPy arrays. Pairwise differences are produced in blocks of rows so a large
+# matrix is written out piece by piece instead of being held in memory (or turned into python objects) at once.
+#
+#   python ship_matrix.py DD 125 --stats reload,torpedo --out dd_125.npy      n x n x stats array of differences
+#   python ship_matrix.py DD 125 --stats reload,torpedo --out dd_125.csv      the same as long-format csv
+#   python ship_matrix.py DD 125 --stats reload --top 10 [--bottom]           leaderboard
+
+DEFAULT_CHUNK_ROWS = 64
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="All-pairs comparison matrix and leaderboards for one hull class at one level")
+    parser.add_argument("hull", help="hull shorthand as in the data file names, e.g. DD, CL, BB")
+    parser.add_argument("level", choices=checker.VALID_LEVELS)
+    parser.add_argument("--stats", default="all", help="comma separated stats (default: all)")
+    parser.add_argument("--out", help="write the pairwise differences to a .npy or .csv file")
+    parser.add_argument("--top", type=checker.positive_int, help="print the top N ships for each stat instead")
+    parser.add_argument("--bottom", action="store_true", help="with --top, print the bottom N instead")
+    parser.add_argument("--chunk-rows", type=checker.positive_int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    ship_data = checker.load_ship_data()
+    class_df = get_class_table(ship_data, args.hull, args.level)
+    stats = checker.parse_stats(args.stats)
+
+    if args.top is not None:
+        for stat in stats:
+            print(f"\n{'Bottom' if args.bottom else 'Top'} {args.top} {args.hull.upper()} by {stat} at level {args.level}:")
+            for rank, name, value in leaderboard(class_df, stat, args.top, bottom=args.bottom):
+                print(f"{rank}. {name}: {value:g}")
+    elif args.out is None:
+        parser.error("nothing to do, give --out or --top")
+    elif args.out.endswith(".npy"):
+        write_pairwise_npy(class_df, stats, args.out, args.chunk_rows)
+    else:
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            write_pairwise_csv(class_df, stats, f, args.chunk_rows)
+
+
+def get_class_table(ship_data: dict, hull: str, level: str) -> pd.DataFrame:
+    """
+    The hull x level table, without the blank rows the level 1 tables have for retrofits.
+    """
+    key = f"{hull.upper()}_Level_{level}"
+    if key not in ship_data:
+        raise ValueError(f"no table {key}")
+    class_df = ship_data[key]
+    return class_df[class_df["Ship Name"].notna()].reset_index(drop=True)
+
+
+def stat_matrix(class_df: pd.DataFrame, stats: list[str]) -> np.ndarray:
+    """
+    (ships, stats) float array, missing values as NaN.
+    """
+    return class_df[stats].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def pairwise_differences(class_df: pd.DataFrame, stats: list[str], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yields (first_row, block) where block[i, j, s] = stat s of ship first_row + i minus stat s of ship j.
+    Any difference involving a missing value is NaN.
+    """
+    values = stat_matrix(class_df, stats)
+    for start in range(0, len(values), chunk_rows):
+        yield start, values[start:start + chunk_rows, None, :] - values[None, :, :]
+
+
+def stat_ranks(class_df: pd.DataFrame, stats: list[str]) -> np.ndarray:
+    """
+    (ships, stats) int array of each ship's rank in each stat, ranked like the comparison modes:
+    1 + the number of ships with a strictly higher value. Ships missing a stat get rank 0.
+    """
+    values = stat_matrix(class_df, stats)
+    sorted_values = np.sort(values, axis=0)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+
+    ranks = np.zeros(values.shape, dtype=np.int64)
+    for j, count in enumerate(counts):
+        present = ~np.isnan(values[:, j])
+        ranks[present, j] = count - np.searchsorted(sorted_values[:count, j], values[present, j], side="right") + 1
+    return ranks
+
+
+def leaderboard(class_df: pd.DataFrame, stat: str, n: int, bottom: bool = False) -> list[tuple[int, str, float]]:
+    """
+    (rank, ship name, value) for the n highest (or lowest) ships in one stat, ships missing the stat left out.
+    """
+    values = stat_matrix(class_df, [stat])[:, 0]
+    ranks = stat_ranks(class_df, [stat])[:, 0]
+    present = np.flatnonzero(~np.isnan(values))
+
+    # stable sort so ties keep table order
+    order = present[np.argsort(values[present] if bottom else -values[present], kind="stable")][:n]
+    names = class_df["Ship Name"].to_numpy()
+    return [(int(ranks[i]), names[i], float(values[i])) for i in order]
+
+
+def write_pairwise_npy(class_df: pd.DataFrame, stats: list[str], path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> None:
+    """
+    Writes the full (ships, ships, stats) difference array to a .npy file, one block of rows at a time.
+    Ship order is the table order; the stats are in the order given.
+    """
+    n = len(class_df)
+    matrix = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(n, n, len(stats)))
+    for start, block in pairwise_differences(class_df, stats, chunk_rows):
+        matrix[start:start + len(block)] = block
+    matrix.flush()
+    del matrix
+
+
+def write_pairwise_csv(class_df: pd.DataFrame, stats: list[str], f: TextIO, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> None:
+    """
+    Writes one line per (ship, other ship, stat): ship,other,stat,difference
+    Missing differences are left empty.
+    """
+    names = class_df["Ship Name"].to_numpy(dtype=object)
+    n = len(names)
+    stat_names = np.array(stats, dtype=object)
+    f.write("ship,other,stat,difference\n")
+
+    for start, block in pairwise_differences(class_df, stats, chunk_rows):
+        rows = len(block)
+        first = np.repeat(names[start:start + rows], n * len(stats))
+        other = np.tile(np.repeat(names, len(stats)), rows)
+        stat = np.tile(stat_names, rows * n)
+        difference = np.char.mod("%g", block.ravel()).astype(object)
+        difference[np.isnan(block.ravel())] = ""
+
+        lines = pd.DataFrame({"ship": first, "other": other, "stat": stat, "difference": difference})
+        lines.to_csv(f, header=False, index=False)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValueError as e:
+        sys.exit(str(e))
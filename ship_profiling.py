@@ -0,0 +1,149 @@
+import sys
+import math
+import time
+import atexit
+import functools
+
+# Timing instrumentation for the hot paths of al_stats_checker, off unless asked for:
+#   AL_STATS_PROFILE=1 python al_stats_checker.py             or   python al_stats_checker.py --profile
+#   AL_STATS_PROFILE=cprofile,tracemalloc python batch_query.py queries.jsonl
+# Modes (comma separated):
+#   timing       call count, total, mean, p50/p90/p99 and max time of each wrapped function (always on when profiling)
+#   cprofile     also runs cProfile over the whole session, writes PROFILE_OUTPUT and prints the top functions
+#   tracemalloc  also traces memory allocations and prints the peak and the lines that allocated the most
+# Everything is printed to stderr when the program exits.
+#
+# 0, false, off, no or an empty value leave it off.
+# When profiling is off nothing is wrapped, the functions are called exactly as they are.
+
+ENV_VAR = "AL_STATS_PROFILE"  # al_stats_checker.PROFILE_ENV_VAR
+OFF_VALUES = ("", "0", "false", "off", "no")  # al_stats_checker.PROFILE_OFF_VALUES
+MODES = ("timing", "cprofile", "tracemalloc")
+PROFILE_OUTPUT = "al_stats_checker.prof"
+TOP = 15
+
+# wrapped in every al_stats_checker module enabled, together with the AVERAGE_STATS_OPTIONS functions
+TARGETS = ("load_ship_data", "find_ship", "get_comparison", "get_two_ship_comparison", "compare_two_ships")
+
+_timings: dict[str, list[int]] = {}
+_modes: set[str] = set()
+_enabled_modules: set[int] = set()
+_profiler = None
+
+
+def parse_modes(value: str) -> set[str]:
+    """
+    "1", "on" or "true" mean timing only, OFF_VALUES mean nothing at all. Raises ValueError for an unknown mode.
+    """
+    if value.strip().lower() in OFF_VALUES:
+        return set()
+    modes = {"timing"}
+    for mode in value.lower().split(","):
+        mode = mode.strip()
+        if mode in ("1", "on", "true", ""):
+            continue
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode '{mode}', expected {', '.join(MODES)}")
+        modes.add(mode)
+    return modes
+
+
+def enable(module, value: str = "timing") -> None:
+    """
+    Wraps the TARGETS and AVERAGE_STATS_OPTIONS functions of module (al_stats_checker, which may be imported
+    both as __main__ and by name) and starts the capture modes in `value`. The summary is printed at exit.
+    """
+    global _profiler
+    modes = parse_modes(value)
+    if not modes:
+        return
+
+    if not _modes:
+        atexit.register(print_summary)
+    if "cprofile" in modes and "cprofile" not in _modes:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if "tracemalloc" in modes and "tracemalloc" not in _modes:
+        import tracemalloc
+        tracemalloc.start()
+    _modes.update(modes)
+
+    if id(module) in _enabled_modules:
+        return
+    _enabled_modules.add(id(module))
+    for name in TARGETS:
+        setattr(module, name, timed(getattr(module, name)))
+    for key, (label, func) in module.AVERAGE_STATS_OPTIONS.items():
+        wrapped = timed(func)
+        module.AVERAGE_STATS_OPTIONS[key] = (label, wrapped)
+        setattr(module, func.__name__, wrapped)
+
+
+def timed(func):
+    times = _timings.setdefault(func.__name__, [])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            times.append(time.perf_counter_ns() - start)
+    return wrapper
+
+
+def summary() -> list[dict]:
+    """
+    One entry per wrapped function that was called, times in milliseconds.
+    """
+    rows = []
+    for name, times in _timings.items():
+        if not times:
+            continue
+        ordered = sorted(times)
+        rows.append({
+            "name": name,
+            "count": len(ordered),
+            "total_ms": sum(ordered) / 1e6,
+            "mean_ms": sum(ordered) / len(ordered) / 1e6,
+            "p50_ms": _percentile(ordered, 50) / 1e6,
+            "p90_ms": _percentile(ordered, 90) / 1e6,
+            "p99_ms": _percentile(ordered, 99) / 1e6,
+            "max_ms": ordered[-1] / 1e6,
+        })
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def print_summary(out=None) -> None:
+    out = out or sys.stderr
+    rows = summary()
+    print("\nTimings (ms):", file=out)
+    print(f"  {'function':<26}{'count':>8}{'total':>11}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}", file=out)
+    for row in rows:
+        print(f"  {row['name']:<26}{row['count']:>8}{row['total_ms']:>11.2f}{row['mean_ms']:>10.3f}"
+              f"{row['p50_ms']:>10.3f}{row['p90_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}", file=out)
+    if not rows:
+        print("  nothing was called", file=out)
+
+    if _profiler is not None:
+        import pstats
+        _profiler.disable()
+        _profiler.dump_stats(PROFILE_OUTPUT)
+        print(f"\ncProfile (full profile written to {PROFILE_OUTPUT}):", file=out)
+        pstats.Stats(_profiler, stream=out).sort_stats("cumulative").print_stats(TOP)
+
+    if "tracemalloc" in _modes:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            print(f"\nMemory: {current / 2**20:.1f} MiB allocated at exit, {peak / 2**20:.1f} MiB peak. Top allocations:", file=out)
+            for stat in snapshot.statistics("lineno")[:TOP]:
+                print(f"  {stat}", file=out)
+
+
+def _percentile(ordered: list[int], q: float) -> int:
+    # nearest rank
+    return ordered[max(0, math.ceil(len(ordered) * q / 100) - 1)]
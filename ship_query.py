@@ -0,0 +1,208 @@
+import re
+import sys
+import operator
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+import ship_schema
+
+# Small query language for finding ships by their stats instead of by name, e.g.
+#   CL level 120, rarity Ultra Rare, anti-air > 400, sort by reload desc, limit 10
+# Clauses are separated by commas, case doesn't matter:
+#   DD | DD|CL | hull DD         hulls to search (default: every hull)
+#   level 120 | level 100|125    levels to search (default: 125), can follow the hull: "CL level 120"
+#   anti-air > 400               stat comparison with >, >=, <, <=, = or !=, stats as in the menus
+#   rarity Ultra Rare            rarity, nation, type or armor, "|" for alternatives, "!=" to exclude
+#   sort by reload [asc|desc]    stats highest first, name (sort by name) and categories alphabetically
+#   limit 10
+#
+# The hulls and levels pick the tables (by their {hull}_Level_{level} key, like find_ship) before any table is read,
+# and the filters on each table are combined as boolean masks over whole columns.
+#
+#   python ship_query.py "CL level 120, anti-air > 400, sort by reload, limit 10"
+
+DEFAULT_LEVEL = checker.VALID_LEVELS[-1]
+NAME_COLUMN = ship_schema.NAME_COLUMN
+CATEGORY_FIELDS = {column.lower(): column for column in ship_schema.CATEGORY_COLUMNS}
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "=": operator.eq, "!=": operator.ne}
+
+_COMPARISON = re.compile(r"(?P<field>[a-z][a-z -]*?)\s*(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>.+)")
+_SORT = re.compile(r"sort\s+by\s+(?P<field>.+?)(?:\s+(?P<order>asc|desc))?")
+_LIMIT = re.compile(r"limit\s+(?P<limit>\d+)")
+_TABLES = re.compile(r"(?:(?:hull\s+)?(?P<hulls>[a-z]+(?:\s*\|\s*[a-z]+)*)\s*)??(?:level\s+(?P<levels>\d+(?:\s*\|\s*\d+)*))?")
+
+
+@dataclass(slots=True)
+class Filter:
+    column: str
+    op: str
+    value: object  # a number for stats, a list of values for categories
+
+
+@dataclass(slots=True)
+class ShipQuery:
+    hulls: Optional[list[str]] = None  # None for every hull
+    levels: list[str] = field(default_factory=list)
+    filters: list[Filter] = field(default_factory=list)
+    sort: Optional[str] = None
+    descending: bool = True
+    limit: Optional[int] = None
+
+    def columns(self) -> list[str]:
+        """
+        Stat columns worth showing with the results: the ones filtered or sorted on.
+        """
+        columns = [f.column for f in self.filters if f.column in ship_schema.STAT_COLUMNS]
+        if self.sort in ship_schema.STAT_COLUMNS:
+            columns.append(self.sort)
+        return list(dict.fromkeys(columns))
+
+
+def parse_query(text: str) -> ShipQuery:
+    """
+    Raises ValueError for a clause that can't be understood.
+    """
+    query = ShipQuery()
+    for clause in text.split(","):
+        clause = " ".join(clause.split())
+        lower = clause.lower()
+        if not clause:
+            continue
+
+        if match := _SORT.fullmatch(lower):
+            query.sort = NAME_COLUMN if match["field"] == "name" else _field(match["field"])
+            # stats highest first, names and categories alphabetically
+            query.descending = match["order"] == "desc" or (match["order"] is None and query.sort in ship_schema.STAT_COLUMNS)
+        elif match := _LIMIT.fullmatch(lower):
+            query.limit = int(match["limit"])
+        elif match := _COMPARISON.fullmatch(lower):
+            query.filters.append(_filter(match["field"].strip(), match["op"], clause[match.start("value"):]))
+        elif lower.split(" ", 1)[0] in CATEGORY_FIELDS and " " in lower:
+            name, value = clause.split(" ", 1)
+            query.filters.append(_filter(name.lower(), "=", value))
+        elif (match := _TABLES.fullmatch(lower)) and (match["hulls"] or match["levels"]):
+            if match["hulls"]:
+                query.hulls = (query.hulls or []) + [hull.strip().upper() for hull in match["hulls"].split("|")]
+            if match["levels"]:
+                query.levels += [level.strip() for level in match["levels"].split("|")]
+        else:
+            raise ValueError(f"can't understand '{clause}' in the query")
+
+    for level in query.levels:
+        if level not in checker.VALID_LEVELS:
+            raise ValueError(f"level must be one of {', '.join(checker.VALID_LEVELS)}")
+    if not query.levels:
+        query.levels = [DEFAULT_LEVEL]
+    return query
+
+
+def plan_tables(query: ShipQuery, ship_data: dict) -> list[tuple[str, str, str]]:
+    """
+    (key, hull, level) of every table the query has to look at, worked out from the keys alone
+    so tables of other hulls and levels are never read.
+    """
+    hulls = list(dict.fromkeys(key.split("_Level_")[0] for key in ship_data))
+    if query.hulls is not None:
+        unknown = [hull for hull in query.hulls if hull not in hulls]
+        if unknown:
+            raise ValueError(f"unknown hull {', '.join(unknown)}, expected one of {', '.join(hulls)}")
+        hulls = [hull for hull in hulls if hull in query.hulls]
+    return [(f"{hull}_Level_{level}", hull, level) for hull in hulls for level in query.levels if f"{hull}_Level_{level}" in ship_data]
+
+
+def run_query(query: ShipQuery, ship_data: dict) -> pd.DataFrame:
+    """
+    The matching ships from every planned table, with their hull, level, rarity and the stats the query uses.
+    """
+    columns = [NAME_COLUMN, "Hull", "Level", "Rarity"] + query.columns()
+    if query.sort is not None and query.sort not in columns:
+        columns.append(query.sort)
+
+    frames = []
+    for key, hull, level in plan_tables(query, ship_data):
+        class_df = ship_data[key]
+        # the level 1 tables have blank rows for retrofits
+        mask = class_df[NAME_COLUMN].notna().to_numpy()
+        for query_filter in query.filters:
+            mask = mask & _mask(class_df[query_filter.column], query_filter)
+            if not mask.any():
+                break
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            # only the columns shown are taken, not whole rows
+            frames.append(pd.DataFrame({
+                column: hull if column == "Hull" else level if column == "Level" else class_df[column].array[rows]
+                for column in columns
+            }))
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(frames, ignore_index=True)
+    if query.sort is not None:
+        result = result.sort_values(query.sort, ascending=not query.descending, na_position="last", kind="stable", ignore_index=True)
+    if query.limit is not None:
+        result = result.head(query.limit)
+    return result
+
+
+def search(text: str, ship_data: dict) -> pd.DataFrame:
+    return run_query(parse_query(text), ship_data)
+
+
+def _mask(column: pd.Series, query_filter: Filter) -> np.ndarray:
+    if query_filter.column in CATEGORY_FIELDS.values():
+        # compare category codes rather than strings; values are matched to the categories ignoring case
+        lookup = {str(category).lower(): code for code, category in enumerate(column.cat.categories)}
+        codes = [lookup[value.lower()] for value in query_filter.value if value.lower() in lookup]
+        found = np.isin(column.cat.codes.to_numpy(), codes)
+        return found if query_filter.op == "=" else ~found & column.notna().to_numpy()
+
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    # missing stats never match, not even !=
+    return OPERATORS[query_filter.op](values, query_filter.value) & ~np.isnan(values)
+
+
+def _field(name: str) -> str:
+    name = name.strip()
+    if name in checker.VALID_STATS and name != "all":
+        return checker.VALID_STATS[name]
+    if name in CATEGORY_FIELDS:
+        return CATEGORY_FIELDS[name]
+    raise ValueError(f"unknown field '{name}'")
+
+
+def _filter(name: str, op: str, value: str) -> Filter:
+    column = _field(name)
+    value = value.strip()
+    if column in CATEGORY_FIELDS.values():
+        if op not in ("=", "!="):
+            raise ValueError(f"{name} can only be compared with = or !=")
+        return Filter(column, op, [part.strip() for part in value.split("|")])
+    try:
+        return Filter(column, op, float(value))
+    except ValueError:
+        raise ValueError(f"'{value}' is not a number to compare {name} to") from None
+
+
+def print_results(result: pd.DataFrame) -> None:
+    if result.empty:
+        print("No ships match.")
+        return
+    print(result.to_string(index=False, na_rep="-"))
+
+
+def main() -> None:
+    if len(sys.argv) != 2 or sys.argv[1] in ("-h", "--help"):
+        print('Usage: python ship_query.py "CL level 120, rarity Ultra Rare, anti-air > 400, sort by reload desc, limit 10"')
+        return
+    try:
+        result = search(sys.argv[1], checker.load_ship_data())
+    except ValueError as e:
+        sys.exit(str(e))
+    print_results(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+from ship_matrix import get_class_table
+
+# Distribution report over every hull x level table and every stat: percentiles, IQR, a histogram per stat,
+# and the percentile and z-score of every ship. The tables are independent, so each one is a job for a process pool
+# (only its numpy arrays are sent to the worker), and the results are put together into two tables:
+#   distributions  one row per hull, level and stat
+#   ships          one row per ship, level and stat
+#
+#   python ship_report.py --out report                     report/distributions.csv and report/ships.csv
+#   python ship_report.py --out report --format parquet    the same as parquet (needs pyarrow)
+#   python ship_report.py --out report --workers 0         everything in this process
+
+PERCENTILES = [5, 10, 25, 50, 75, 90, 95]
+DEFAULT_BINS = 10
+FORMATS = ("csv", "parquet")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Percentile and distribution report for every hull, level and stat")
+    parser.add_argument("--out", required=True, help="folder to write distributions.<format> and ships.<format> to")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--stats", default="all", help="comma separated stats (default: all)")
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS, help=f"histogram bins per stat (default: {DEFAULT_BINS})")
+    parser.add_argument("--workers", type=int, default=None, help="processes used for the tables (default: one per cpu, 0 to run in this process)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ship_data = checker.load_ship_data()
+    distributions, ships = build_report(ship_data, checker.parse_stats(args.stats), args.bins, args.workers)
+    write_report(distributions, ships, args.out, args.format)
+    print(f"{len(distributions)} distributions, {len(ships)} ship rows written to {args.out} in {time.perf_counter() - start:.2f}s")
+
+
+def build_report(ship_data: dict, stats: list[str], bins: int = DEFAULT_BINS, workers=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns the (distributions, ships) tables for every table in ship_data.
+    """
+    jobs = []
+    for key in ship_data:
+        hull, level = key.split("_Level_")
+        class_df = get_class_table(ship_data, hull, level)
+        values = class_df[stats].to_numpy(dtype=np.float64, na_value=np.nan)
+        jobs.append((hull, level, class_df["ID"].to_numpy(dtype=object), class_df["Ship Name"].to_numpy(dtype=object), values, stats, bins))
+
+    if workers == 0:
+        results = [_table_report(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_table_report, jobs))
+
+    distributions = pd.concat([pd.DataFrame(result[0]) for result in results], ignore_index=True)
+    ships = pd.concat([pd.DataFrame(result[1]) for result in results], ignore_index=True)
+    for df in (distributions, ships):
+        for column in ("Hull", "Level", "Stat"):
+            df[column] = df[column].astype("category")
+    return distributions, ships
+
+
+def write_report(distributions: pd.DataFrame, ships: pd.DataFrame, folder: str, fmt: str = "csv") -> None:
+    os.makedirs(folder, exist_ok=True)
+    for name, df in (("distributions", distributions), ("ships", ships)):
+        path = os.path.join(folder, f"{name}.{fmt}")
+        if fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False)
+
+
+def _table_report(job: tuple) -> tuple[dict, dict]:
+    """
+    Column dicts for the distributions and ships rows of one table. All stats are done at once as columns of `values`.
+    """
+    hull, level, ids, names, values, stats, bins = job
+    n_ships, n_stats = values.shape
+    missing = np.isnan(values)
+    count = np.count_nonzero(~missing, axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if n_ships:
+            # all-NaN columns (e.g. oxygen of a retrofit only table) give NaN without the warning
+            sorted_values = np.sort(values, axis=0)
+            mean = np.nansum(values, axis=0) / count
+            std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / count)
+            percentiles = np.array([_column_percentile(sorted_values, count, q) for q in PERCENTILES])
+        else:
+            sorted_values = values
+            mean = std = np.full(n_stats, np.nan)
+            percentiles = np.full((len(PERCENTILES), n_stats), np.nan)
+
+        lowest = np.where(count > 0, sorted_values[0] if n_ships else np.nan, np.nan)
+        highest = np.array([sorted_values[c - 1, s] if c else np.nan for s, c in enumerate(count)])
+
+        # percentile of each ship: share of the table at or below its value; z-score against the population std
+        at_or_below = np.column_stack([np.searchsorted(sorted_values[:c, s], values[:, s], side="right") for s, c in enumerate(count)]) if n_ships else values
+        ship_percentile = np.where(missing, np.nan, at_or_below / count * 100)
+        z_score = np.where(missing, np.nan, np.where(std > 0, (values - mean) / std, 0.0))
+
+    histograms = np.zeros((n_stats, bins), dtype=np.int64)
+    for s, c in enumerate(count):
+        if c:
+            histograms[s], _ = np.histogram(sorted_values[:c, s], bins=bins, range=(lowest[s], highest[s]))
+
+    distributions = {
+        "Hull": [hull] * n_stats,
+        "Level": [level] * n_stats,
+        "Stat": stats,
+        "Count": count,
+        "Mean": mean,
+        "Std": std,
+        "Min": lowest,
+        **{f"P{q}": percentiles[i] for i, q in enumerate(PERCENTILES)},
+        "Max": highest,
+        "IQR": percentiles[PERCENTILES.index(75)] - percentiles[PERCENTILES.index(25)],
+        # equal width bins from Min to Max
+        "Bin Width": (highest - lowest) / bins,
+        **{f"Bin {b}": histograms[:, b] for b in range(bins)},
+    }
+    ships = {
+        "Hull": [hull] * (n_ships * n_stats),
+        "Level": [level] * (n_ships * n_stats),
+        "ID": np.repeat(ids, n_stats),
+        "Ship Name": np.repeat(names, n_stats),
+        "Stat": np.tile(np.array(stats, dtype=object), n_ships),
+        "Value": values.ravel(),
+        "Percentile": ship_percentile.ravel(),
+        "Z-Score": z_score.ravel(),
+    }
+    return distributions, ships
+
+
+def _column_percentile(sorted_values: np.ndarray, count: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linearly interpolated q-th percentile of each column over its first `count` (non-missing) values,
+    the same as np.percentile but for columns with different numbers of missing values.
+    """
+    position = (count - 1) * q / 100
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+    columns = np.arange(sorted_values.shape[1])
+    lower_values = sorted_values[np.maximum(lower, 0), columns]
+    upper_values = sorted_values[np.maximum(upper, 0), columns]
+    result = lower_values + (position - lower) * (upper_values - lower_values)
+    return np.where(count > 0, result, np.nan)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (ValueError, ImportError) as e:
+        sys.exit(str(e))
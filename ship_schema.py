@@ -0,0 +1,62 @@
+import pandas as pd
+
+# Column types for the ship stat tables, used both when the scraper writes the csv files and when they are read,
+# so every table has the same compact types instead of whatever read_csv infers:
+# - ID stays text so "001" keeps its leading zeros. IDs run from 3 to 5 characters ("001", "10088"), so a fixed width
+#   would mean padding them and changing what is shown; pandas has no fixed-width string column type anyway
+#   (the snapshot stores them as int32 codes into its string table)
+# - columns with a few repeated values (rarity, nation, type, armor) are categoricals
+# - stats are nullable 16 bit integers; retrofits have no level 1 stats and no oxygen/ammunition, those stay missing
+
+ID_COLUMN = "ID"
+NAME_COLUMN = "Ship Name"
+CATEGORY_COLUMNS = ["Rarity", "Nation", "Type", "Armor"]
+STAT_COLUMNS = ["Luck", "Speed", "Health", "Firepower", "Anti-Air", "Torpedo", "Evasion", "Aviation",
+                "Oil Consumption", "Reload", "Anti-Submarine", "Oxygen", "Ammunition", "Accuracy"]
+STAT_DTYPE = "Int16"
+
+# for pd.read_csv, which then gives every column its final type in one pass (blank cells read as missing)
+CSV_DTYPES = {ID_COLUMN: str, NAME_COLUMN: str, **{column: "category" for column in CATEGORY_COLUMNS}, **{column: STAT_DTYPE for column in STAT_COLUMNS}}
+
+
+def read_csv(path: str) -> pd.DataFrame:
+    """
+    A csv written by the scraper, already in the schema types: read_csv converts every column itself,
+    so there's nothing left for apply_schema to do.
+    """
+    return pd.read_csv(path, dtype=CSV_DTYPES, keep_default_na=False, na_values=[""])
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns df with every known column converted to its schema type.
+    Raises ValueError if a stat isn't a whole number that fits the stat type.
+    Columns the schema doesn't know about are left as they are.
+    """
+    columns = {}
+    converted = False
+    for column in df.columns:
+        series = df[column]
+        if column in STAT_COLUMNS and series.dtype != STAT_DTYPE:
+            try:
+                if not pd.api.types.is_numeric_dtype(series.dtype):
+                    # scraped values are text, blank cells become missing
+                    series = pd.to_numeric(_blank_to_missing(series), errors="raise")
+                series = series.astype(STAT_DTYPE)
+            except (TypeError, ValueError, OverflowError) as e:
+                raise ValueError(f"Column {column} doesn't fit {STAT_DTYPE}: {e}") from e
+            converted = True
+        elif column in CATEGORY_COLUMNS and not isinstance(series.dtype, pd.CategoricalDtype):
+            series = _blank_to_missing(series).astype("category")
+            converted = True
+        elif column in (ID_COLUMN, NAME_COLUMN) and (series == "").any():
+            series = _blank_to_missing(series)
+            converted = True
+        columns[column] = series
+    return pd.DataFrame(columns, index=df.index) if converted else df
+
+
+def _blank_to_missing(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series
+    return series.mask(series == "")
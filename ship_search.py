@@ -0,0 +1,122 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+# Fuzzy and prefix search over normalised ship names, for suggesting ships when a lookup doesn't match exactly.
+# Built once from the name index: a prefix trie for "starts with" matches and a trigram index that narrows
+# typo matches down to a handful of candidates before any edit distance is computed.
+
+
+class ShipSearchIndex:
+    """
+    names maps each normalised name to what should be shown for it (the name as written in the data),
+    levels optionally maps each normalised name to the levels it exists at.
+    """
+    def __init__(self, names: dict[str, str], levels: Optional[dict[str, Iterable[str]]] = None) -> None:
+        self.names = list(names)
+        self.display_names = [names[name] for name in self.names]
+        self.levels = [frozenset(levels[name]) if levels else frozenset() for name in self.names]
+
+        self.trie = {}
+        self.trigrams = defaultdict(list)
+        for name_id, name in enumerate(self.names):
+            node = self.trie
+            for c in name:
+                node = node.setdefault(c, {})
+            node.setdefault(_END, []).append(name_id)
+
+            for trigram in set(_trigrams(name)):
+                self.trigrams[trigram].append(name_id)
+
+    def suggest(self, query: str, limit: int = 5, level: Optional[str] = None) -> list[str]:
+        """
+        Up to `limit` display names best matching the normalised query, best first:
+        exact match, then names starting with the query (shortest first), then the closest typo matches.
+        With `level`, only ships that exist at that level are suggested.
+        """
+        results = []
+        seen = set()
+
+        def add(name_id: int) -> bool:
+            if name_id in seen or (level is not None and self.levels[name_id] and level not in self.levels[name_id]):
+                return False
+            seen.add(name_id)
+            results.append(name_id)
+            return len(results) >= limit
+
+        for name_id in sorted(self._prefix_matches(query), key=lambda name_id: (len(self.names[name_id]), self.names[name_id])):
+            if add(name_id):
+                return self._display(results)
+
+        for name_id in self._fuzzy_matches(query):
+            if add(name_id):
+                break
+        return self._display(results)
+
+    def _prefix_matches(self, prefix: str) -> list[int]:
+        node = self.trie
+        for c in prefix:
+            node = node.get(c)
+            if node is None:
+                return []
+
+        matches = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _END:
+                    matches.extend(child)
+                else:
+                    stack.append(child)
+        return matches
+
+    def _fuzzy_matches(self, query: str, candidates: int = 20) -> list[int]:
+        """
+        Names sharing the most trigrams with the query, re-ranked by edit distance.
+        """
+        shared = defaultdict(int)
+        for trigram in set(_trigrams(query)):
+            for name_id in self.trigrams.get(trigram, ()):
+                shared[name_id] += 1
+        if not shared:
+            return []
+
+        best = sorted(shared, key=lambda name_id: -shared[name_id])[:candidates]
+        max_distance = max(2, len(query) // 2)
+        scored = []
+        for name_id in best:
+            distance = edit_distance(query, self.names[name_id], max_distance)
+            if distance <= max_distance:
+                scored.append((distance, -shared[name_id], self.names[name_id], name_id))
+        scored.sort()
+        return [name_id for *_, name_id in scored]
+
+    def _display(self, name_ids: list[int]) -> list[str]:
+        return [self.display_names[name_id] for name_id in name_ids]
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between a and b, or max_distance + 1 as soon as it is known to be larger.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _trigrams(text: str) -> list[str]:
+    # padded so short names and the start/end of names still produce trigrams
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+_END = "\0"
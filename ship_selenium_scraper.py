@@ -1,56 +1,179 @@
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import ship_schema
+import argparse
+import hashlib
 import re
 import os
 
+WEBSITE = "https://azurlane.koumakan.jp/wiki/List_of_Ships_by_Stats"
+
+SHIP_CLASSES = ["Destroyers", "Light_Cruisers", "Heavy_Cruisers_and_Large_Cruisers",
+                "Battleships,_Battlecruisers,_Aviation_Battleships_and_Monitors",
+                "Aircraft_Carriers_and_Light_Aircraft_Carriers",
+                "Submarines_and_Submarine_Carriers", "Auxiliaries",
+                "Sailing_Frigates_(Submarine),_Sailing_Frigates_(Vanguard)_and_Sailing_Frigates_(Main)"]
+
+SHIP_CLASS_MAP = {
+    "Destroyers": "DD",
+    "Light_Cruisers": "CL",
+    "Heavy_Cruisers_and_Large_Cruisers": "CA",
+    "Battleships,_Battlecruisers,_Aviation_Battleships_and_Monitors": "BB",
+    "Aircraft_Carriers_and_Light_Aircraft_Carriers": "CV",
+    "Submarines_and_Submarine_Carriers": "SS",
+    "Auxiliaries": "AUX",
+    "Sailing_Frigates_(Submarine),_Sailing_Frigates_(Vanguard)_and_Sailing_Frigates_(Main)": "IX"
+}
+
 def main():
-    website = "https://azurlane.koumakan.jp/wiki/List_of_Ships_by_Stats"
+    parser = argparse.ArgumentParser(description="Scrape the ship stats tables into ship_stats_data")
+    parser.add_argument("--html", help="parse a saved copy of the page instead of opening it in a browser")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "ship_stats_data"), help="folder to write the csv files to")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to parse the hull sections (default: one per cpu, 0 to parse in this process)")
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            page_source = f.read()
+    else:
+        page_source = fetch_page_source()
+
+    # imported here so the worker processes that parse the page don't load the checker too
+    import al_stats_checker as checker
+    import ship_versions
+
+    # the data as it was before the first versioned scrape, so that one has something to be compared with
+    versions = ship_versions.list_versions(args.out)
+    if not versions and os.path.isdir(args.out) and any(name.endswith(".csv") for name in os.listdir(args.out)):
+        versions.append(ship_versions.save_version(checker.load_ship_data_from_csv(args.out), args.out))
+
+    changed = scrape_to_folder(page_source, args.out, args.workers)
+    print(f"{len(changed)} file(s) changed: {', '.join(changed) if changed else 'none'}")
+    if changed:
+        new_data = checker.load_ship_data_from_csv(args.out)
+        name = ship_versions.save_version(new_data, args.out)
+        print(f"Saved version {name}")
+        if versions:
+            print(f"{versions[-1]} -> {name}:")
+            ship_versions.print_diff(ship_versions.diff_datasets(ship_versions.load_version(args.out, versions[-1]), new_data))
+
+def fetch_page_source() -> str:
+    """
+    Open the wiki page in Edge and return its html once the tables have loaded.
+    """
+    # only needed for live scraping, parsing a saved page works without selenium installed
+    from selenium import webdriver
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     service = Service(executable_path='C:/Users/simad/OneDrive/Documents/edgedriver_win64/msedgedriver.exe')
     driver = webdriver.Edge(service=service)
-    driver.get(website)
-    
-    wait = WebDriverWait(driver, 10)
-    element = wait.until(EC.presence_of_element_located((By.ID, "Destroyers")))
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    ship_classes = ["Destroyers", "Light_Cruisers", "Heavy_Cruisers_and_Large_Cruisers", 
-                    "Battleships,_Battlecruisers,_Aviation_Battleships_and_Monitors",
-                    "Aircraft_Carriers_and_Light_Aircraft_Carriers",
-                    "Submarines_and_Submarine_Carriers", "Auxiliaries",
-                    "Sailing_Frigates_(Submarine),_Sailing_Frigates_(Vanguard)_and_Sailing_Frigates_(Main)"]
-    
-    ship_class_map = {
-        "Destroyers": "DD",
-        "Light_Cruisers": "CL",
-        "Heavy_Cruisers_and_Large_Cruisers": "CA",
-        "Battleships,_Battlecruisers,_Aviation_Battleships_and_Monitors": "BB",
-        "Aircraft_Carriers_and_Light_Aircraft_Carriers": "CV",
-        "Submarines_and_Submarine_Carriers": "SS",
-        "Auxiliaries": "AUX",
-        "Sailing_Frigates_(Submarine),_Sailing_Frigates_(Vanguard)_and_Sailing_Frigates_(Main)": "IX"
-    }
-    
-    # search the soup for each ship class and use the function to extract the table data
+    try:
+        driver.get(WEBSITE)
+        wait = WebDriverWait(driver, 10)
+        element = wait.until(EC.presence_of_element_located((By.ID, "Destroyers")))
+        return driver.page_source
+    finally:
+        driver.quit()
+
+def scrape_to_folder(page_source: str, folder_path: str, workers=None) -> list[str]:
+    """
+    Parse every hull section of the page and write each level table to {shorthand}_{level}.csv in folder_path.
+    Files whose content hasn't changed are left alone (so their modification time doesn't change either),
+    which keeps anything built from them, like the snapshot in ship_snapshot.py, from being rebuilt for nothing.
+    Returns the names of the files that were written.
+    """
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+
+    tables = {}
     # each ship_level_table is a dict the key being the level e.g. Level_100 and value being a pandas dataframe
-    for ship_class in ship_classes: 
-        shorthand = ship_class_map[ship_class]
-        ship_level_tables = get_shipclass_stats(ship_class, soup)
+    for ship_class, ship_level_tables in parse_page(page_source, workers).items():
+        shorthand = SHIP_CLASS_MAP[ship_class]
         for level, df in ship_level_tables.items():
-            folder_path = os.path.join(os.path.dirname(__file__), "ship_stats_data")
-            if not os.path.exists(folder_path):
-                os.makedirs(folder_path)
-            csv_filename = f"{shorthand}_{level}.csv"
-            df.to_csv(os.path.join(folder_path, csv_filename), index=False)
-            
+            # checks every column of every table has the expected type before anything is written,
+            # so a bad value anywhere on the page leaves all the files as they were
+            tables[f"{shorthand}_{level}.csv"] = ship_schema.apply_schema(df)
+
+    changed = []
+    for csv_filename, df in tables.items():
+        if write_if_changed(df, os.path.join(folder_path, csv_filename)):
+            changed.append(csv_filename)
+    return changed
+
+def parse_page(page_source: str, workers=None) -> dict:
+    """
+    Returns {ship class: {level: dataframe}} for every class in SHIP_CLASSES.
+    The page is cut into one piece of html per hull section, and the pieces are parsed in a process pool
+    (or in this process if workers is 0).
+    """
+    sections = split_sections(page_source)
+    parser = html_parser()
+    jobs = [(ship_class, sections[ship_class], parser) for ship_class in SHIP_CLASSES]
+
+    if workers == 0:
+        results = [_parse_section(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_section, jobs))
+    return dict(zip(SHIP_CLASSES, results))
+
+def split_sections(page_source: str) -> dict:
+    """
+    The html of each hull section: from its <h2> heading up to the next <h2> (or the end of the page).
+    """
+    heading = re.compile(r"<h2\b[^>]*>", re.IGNORECASE)
+    starts = [match.start() for match in heading.finditer(page_source)]
+
+    sections = {}
+    for ship_class in SHIP_CLASSES:
+        match = re.search(r'<h2\b[^>]*\bid="' + re.escape(ship_class) + '"', page_source)
+        if match is None:
+            raise ValueError(f"Section {ship_class} not found in the page")
+        end = next((start for start in starts if start > match.start()), len(page_source))
+        sections[ship_class] = page_source[match.start():end]
+    return sections
+
+def html_parser() -> str:
+    """
+    lxml is much faster than the built-in parser, use it when it is installed
+    """
+    try:
+        import lxml
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+def _parse_section(job: tuple) -> dict:
+    ship_class, section_html, parser = job
+    return get_shipclass_stats(ship_class, BeautifulSoup(section_html, parser))
+
+def write_if_changed(df: pd.DataFrame, path: str) -> bool:
+    """
+    Write df to path as csv unless the file already has exactly that content (compared by sha256).
+    Returns whether the file was written.
+    """
+    content = df.to_csv(index=False).encode("utf-8")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(content).digest():
+                return False
+    with open(path, "wb") as f:
+        f.write(content)
+    return True
+
 def get_shipclass_stats(shipclass: str, soup) -> dict:
-    
+
     class_heading = soup.find("h2", id=shipclass)
     table_div = class_heading.parent.find_next_sibling() # get the tabber div after the header that contains the articles containing the tables
-    stats_articles = table_div.find_all("article", class_="tabber__panel") # get each article which contain the tables
+    if table_div is not None:
+        stats_articles = table_div.find_all("article", class_="tabber__panel") # get each article which contain the tables
+    else:
+        # a section cut out by split_sections has no wrapper around the heading, the tables just follow it
+        stats_articles = class_heading.find_all_next("article", class_="tabber__panel")
 
 
     ship_level_tables = {} # each ship class has four ship level tables at levels 1, 100, 120 and 125
@@ -61,7 +184,7 @@ def get_shipclass_stats(shipclass: str, soup) -> dict:
 
         # take the raw extracted ID e.g. tabber-Level_100_4
         # use a regular expression to recognise the ship level to turn it into Level_100
-        match = re.search(r"(Level_\d+)", ship_level_id) 
+        match = re.search(r"(Level_\d+)", ship_level_id)
         if match:
             ship_level = match.group(1)
 
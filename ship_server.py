@@ -0,0 +1,179 @@
+import sys
+import json
+import asyncio
+import argparse
+import threading
+import traceback
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl
+import al_stats_checker as checker
+import batch_query
+import ship_versions
+
+# Small HTTP/JSON server that keeps the ship data loaded, so callers don't pay for starting the program per query.
+# Endpoints (GET, parameters in the query string, same meaning as the batch query fields in batch_query.py):
+#   /lookup?ship=laffey&level=125&stats=reload,torpedo
+#   /compare?ship=laffey&level=125&mode=rarity&stats=all
+#   /compare_two?ship=laffey&other=javelin&level=120&stats=reload
+#   /growth?ship=laffey&level=110&stats=reload
+#   /query?query=CL level 120, anti-air > 400, sort by reload, limit 10   (url encoded)
+#   /similar?ship=laffey&level=125&k=5&profile=torpedo dd
+#   /health
+#   /reload   reads ship_stats_data again after a scrape, tables that didn't change (and what's cached for them) are kept;
+#             runs in a thread so other connections are still answered meanwhile
+# Connections are kept alive (HTTP/1.1) and every answer is cached until a reload changes the data.
+# Request bodies aren't read, so a request that has one gets its answer and the connection is closed.
+
+ENDPOINTS = ("lookup", "compare", "compare_two", "growth", "query", "similar")
+MAX_HEADER_BYTES = 16 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+# loaded once by serve(), replaced by /reload
+SHIP_DATA = None
+# part of every cache key, bumped after SHIP_DATA is replaced so no answer about the older data is served again
+# (a query racing a reload can only cache an answer about the newer data under the older generation)
+_GENERATION = 0
+_RELOAD_LOCK = threading.Lock()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve ship stat queries over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Load the ship data and serve until interrupted.
+    """
+    global SHIP_DATA
+    SHIP_DATA = checker.load_ship_data()
+    try:
+        asyncio.run(_serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"Serving ship stats on http://{host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """
+    Answers requests on one connection until the client closes it or asks for Connection: close.
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            if len(head) > MAX_HEADER_BYTES:
+                break
+
+            lines = head.decode("latin-1").split("\r\n")
+            parts = lines[0].split(" ")
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            if len(parts) != 3:
+                status, body = 400, _error_body("malformed request line")
+            elif parts[0] != "GET":
+                status, body = 405, _error_body("only GET is supported")
+            elif urlsplit(parts[1]).path.strip("/") == "reload":
+                status, body = await asyncio.to_thread(answer, parts[1])
+            else:
+                status, body = answer(parts[1])
+
+            # an unread body would be taken for the next request
+            has_body = headers.get("content-length", "0") != "0" or "transfer-encoding" in headers
+            keep_alive = (headers.get("connection", "").lower() != "close" and parts[-1] == "HTTP/1.1"
+                          and status not in (400, 405) and not has_body)
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+def answer(target: str) -> tuple[int, bytes]:
+    """
+    Status code and JSON body for a request target such as /lookup?ship=laffey&level=125
+    """
+    url = urlsplit(target)
+    # sorted so the same query with its parameters in a different order shares a cache entry
+    params = tuple(sorted(parse_qsl(url.query)))
+    try:
+        if url.path.strip("/") == "reload":
+            return reload()
+        return _cached_answer(url.path.strip("/"), params, _GENERATION)
+    except Exception:
+        # a bug answering one request shouldn't drop the connection without a response
+        traceback.print_exc(file=sys.stderr)
+        return 500, _error_body("internal error")
+
+
+def reload() -> tuple[int, bytes]:
+    """
+    Picks up changed csv files. The body lists what changed per table.
+    """
+    global SHIP_DATA, _GENERATION
+    with _RELOAD_LOCK:
+        SHIP_DATA, diff = ship_versions.refresh(SHIP_DATA)
+        if not diff.unchanged:
+            _GENERATION += 1
+            _cached_answer.cache_clear()
+    result = {
+        "changed": not diff.unchanged,
+        "added_tables": diff.added_tables,
+        "removed_tables": diff.removed_tables,
+        "tables": {
+            key: {"added": len(table.added), "removed": len(table.removed), "changed": len(table.changed),
+                  "added_columns": table.added_columns, "removed_columns": table.removed_columns}
+            for key, table in diff.tables.items() if not table.unchanged
+        },
+    }
+    return 200, json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+@lru_cache(maxsize=4096)
+def _cached_answer(endpoint: str, params: tuple, generation: int) -> tuple[int, bytes]:
+    # generation isn't used here, it only keys the cache (see _GENERATION)
+    if endpoint == "health":
+        return 200, b'{"status": "ok"}'
+    if endpoint not in ENDPOINTS:
+        return 404, _error_body(f"unknown endpoint '/{endpoint}', expected one of /{', /'.join(ENDPOINTS)}")
+
+    query = dict(params)
+    query["op"] = endpoint
+    try:
+        result = batch_query.answer_query(query, SHIP_DATA)
+    except (KeyError, ValueError) as e:
+        result = batch_query.error_result(e)
+        result.pop("id")
+        return 400, json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+    result.pop("id", None)
+    return 200, json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+if __name__ == "__main__":
+    main()
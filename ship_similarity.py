@@ -0,0 +1,217 @@
+import sys
+import argparse
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+from stats_engine import TableCache
+
+# Composite scores and "similar ships" over all the stats at once.
+# Each hull x level table becomes a matrix of standardised stats (z-scores against that table, missing stats count
+# as average), so stats with big numbers like health don't drown out the others. A weight profile says how much
+# each stat counts:
+#   score       weighted mean of a ship's z-scores, negative weights for stats where lower is better (oil consumption)
+#   similarity  weighted euclidean distance between two ships' z-scores (the sign of a weight doesn't matter here)
+# Nearest neighbours are found for the whole table at once with one matrix product, not ship by ship.
+#
+#   python ship_similarity.py laffey --level 125 --k 5 --profile "torpedo dd"
+#   python ship_similarity.py --rank DD --level 125 --weights torpedo:3,reload:2,evasion:1 --k 10
+
+STATS = [col for col in checker.VALID_STATS.values() if col != "all"]
+
+WEIGHT_PROFILES = {
+    "balanced": {**{stat: 1.0 for stat in STATS}, "Oil Consumption": -1.0},
+    "torpedo dd": {"Torpedo": 3.0, "Reload": 2.0, "Evasion": 2.0, "Health": 1.0, "Speed": 1.0, "Anti-Air": 0.5, "Firepower": 0.5},
+    "gun dd": {"Firepower": 3.0, "Reload": 2.0, "Evasion": 1.5, "Accuracy": 1.0, "Health": 1.0, "Torpedo": 0.5},
+    "anti-air": {"Anti-Air": 3.0, "Reload": 1.5, "Health": 1.0, "Evasion": 1.0},
+    "firepower": {"Firepower": 3.0, "Reload": 2.0, "Accuracy": 1.0, "Health": 1.0},
+    "tank": {"Health": 3.0, "Evasion": 2.0, "Anti-Air": 1.0, "Anti-Submarine": 0.5},
+    "carrier": {"Aviation": 3.0, "Reload": 2.0, "Health": 1.0, "Anti-Air": 1.0, "Oil Consumption": -1.0},
+    "submarine": {"Torpedo": 3.0, "Reload": 2.0, "Oxygen": 2.0, "Ammunition": 1.0, "Health": 1.0},
+}
+DEFAULT_PROFILE = "balanced"
+# entries of the cache below: a FeatureIndex per table, and its features scaled per distinct weights asked for
+CACHE_SIZE = 256
+
+
+@dataclass(slots=True)
+class SimilarShip:
+    ship_name: str
+    distance: float
+    score: float
+
+
+class FeatureIndex:
+    """
+    Standardised stats of one class table: features[i, j] is the z-score of stat STATS[j] for ship i.
+    Blank rows (retrofits in the level 1 tables) are left out.
+    """
+    __slots__ = ("names", "features", "_positions")
+
+    def __init__(self, class_df: pd.DataFrame) -> None:
+        class_df = class_df[class_df["Ship Name"].notna()]
+        values = class_df[STATS].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.names = class_df["Ship Name"].to_numpy(dtype=object)
+        # row label in class_df -> row here, for rows find_ship returns
+        self._positions = {label: i for i, label in enumerate(class_df.index)}
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.nanmean(values, axis=0) if len(values) else np.zeros(len(STATS))
+            std = np.nanstd(values, axis=0) if len(values) else np.zeros(len(STATS))
+            features = (values - mean) / std
+        # a stat every ship has the same value of (e.g. aviation for destroyers) tells the ships nothing apart
+        features[:, ~(std > 0)] = 0.0
+        self.features = np.nan_to_num(features, nan=0.0)
+
+    def position(self, ship_row: pd.Series) -> Optional[int]:
+        return self._positions.get(ship_row.name)
+
+    def scores(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Composite score of every ship: the mean of its z-scores weighted by `weights` (one per stat in STATS).
+        """
+        return self.features @ weights / np.abs(weights).sum()
+
+    def weighted(self, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The features scaled by sqrt(|weight|) and their squared norms, what nearest works on.
+        """
+        scaled = self.features * np.sqrt(np.abs(weights))
+        return scaled, np.einsum("ij,ij->i", scaled, scaled)
+
+    def nearest(self, position: int, weighted: tuple[np.ndarray, np.ndarray], k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and distances of the k ships closest to the ship at `position`, closest first, the ship itself left out.
+        weighted is what self.weighted returns for the weights to use.
+        """
+        scaled, norms = weighted
+        # |a - b|^2 = |a|^2 - 2 a.b + |b|^2 for every ship at once
+        squared = norms - 2 * scaled @ scaled[position] + norms[position]
+        squared[position] = np.inf
+        k = min(k, len(squared) - 1)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        closest = np.argpartition(squared, k - 1)[:k]
+        closest = closest[np.argsort(squared[closest], kind="stable")]
+        return closest, np.sqrt(np.maximum(squared[closest], 0.0))
+
+
+# bounded, so neither the tables of older loads nor custom weights from the server pile up
+_CACHE = TableCache(CACHE_SIZE)
+
+
+def feature_index(class_df: pd.DataFrame) -> FeatureIndex:
+    """
+    The FeatureIndex of class_df, built once per table and dropped when the table is.
+    """
+    return _CACHE.get(class_df, None, lambda: FeatureIndex(class_df))
+
+
+def weighted_features(class_df: pd.DataFrame, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    FeatureIndex.weighted of class_df's index, cached per table and weights.
+    """
+    return _CACHE.get(class_df, weights.tobytes(), lambda: feature_index(class_df).weighted(weights))
+
+
+def parse_weights(profile: Optional[str] = None, weights: Optional[str] = None) -> np.ndarray:
+    """
+    One weight per stat in STATS, from a profile name in WEIGHT_PROFILES or a comma separated list like
+    "torpedo:3,reload:2,oil consumption:-1" (stats that aren't listed get 0). Raises ValueError if neither makes sense.
+    """
+    if weights:
+        chosen = {}
+        for part in str(weights).split(","):
+            name, _, value = part.partition(":")
+            stats = checker.parse_stats(name)
+            try:
+                weight = float(value) if value.strip() else 1.0
+            except ValueError:
+                raise ValueError(f"weight for {name.strip()} must be a number") from None
+            if not np.isfinite(weight):
+                raise ValueError(f"weight for {name.strip()} must be a finite number")
+            for stat in stats:
+                chosen[stat] = weight
+    else:
+        name = str(profile or DEFAULT_PROFILE).strip().lower()
+        if name not in WEIGHT_PROFILES:
+            raise ValueError(f"unknown profile '{name}', expected one of {', '.join(WEIGHT_PROFILES)}")
+        chosen = WEIGHT_PROFILES[name]
+
+    vector = np.array([chosen.get(stat, 0.0) for stat in STATS])
+    if not np.abs(vector).sum():
+        raise ValueError("at least one stat needs a weight")
+    return vector
+
+
+def similar_ships(ship_row: pd.Series, class_df: pd.DataFrame, weights: np.ndarray, k: int = 5) -> list[SimilarShip]:
+    """
+    The k ships in class_df whose weighted stats are closest to ship_row's. Raises ValueError if k is below 1.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    index = feature_index(class_df)
+    position = index.position(ship_row)
+    if position is None:
+        return []
+    closest, distances = index.nearest(position, weighted_features(class_df, weights), k)
+    scores = index.scores(weights)
+    return [SimilarShip(index.names[i], float(distance), float(scores[i])) for i, distance in zip(closest, distances)]
+
+
+def ship_score(ship_row: pd.Series, class_df: pd.DataFrame, weights: np.ndarray) -> Optional[float]:
+    index = feature_index(class_df)
+    position = index.position(ship_row)
+    return None if position is None else float(index.scores(weights)[position])
+
+
+def rank_by_score(class_df: pd.DataFrame, weights: np.ndarray, top: Optional[int] = None) -> pd.DataFrame:
+    """
+    Every ship of the table with its composite score, best first.
+    """
+    index = feature_index(class_df)
+    ranking = pd.DataFrame({"Ship Name": index.names, "Score": index.scores(weights)})
+    ranking = ranking.sort_values("Score", ascending=False, kind="stable", ignore_index=True)
+    return ranking if top is None else ranking.head(top)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ships with the most similar stats, or a ranking by a weighted composite score")
+    parser.add_argument("ship", nargs="?", help="ship to find similar ships for")
+    parser.add_argument("--rank", metavar="HULL", help="rank every ship of this hull by score instead")
+    parser.add_argument("--level", choices=checker.VALID_LEVELS, default=checker.VALID_LEVELS[-1])
+    parser.add_argument("--k", type=checker.positive_int, default=5, help="number of ships to show (default: 5)")
+    parser.add_argument("--profile", help=f"weight profile: {', '.join(WEIGHT_PROFILES)} (default: {DEFAULT_PROFILE})")
+    parser.add_argument("--weights", help="custom weights instead of a profile, e.g. torpedo:3,reload:2,oil consumption:-1")
+    args = parser.parse_args()
+
+    ship_data = checker.load_ship_data()
+    weights = parse_weights(args.profile, args.weights)
+
+    if args.rank:
+        key = f"{args.rank.upper()}_Level_{args.level}"
+        if key not in ship_data:
+            raise ValueError(f"no table {key}")
+        ranking = rank_by_score(ship_data[key], weights, args.k)
+        for rank, (name, score) in enumerate(zip(ranking["Ship Name"], ranking["Score"]), start=1):
+            print(f"{rank}. {name}: {score:+.3f}")
+        return
+    if not args.ship:
+        parser.error("give a ship or --rank HULL")
+
+    ship_row, class_df = checker.find_ship(args.ship, args.level, ship_data)
+    if ship_row is None:
+        suggestions = checker.suggest_ships(args.ship, ship_data, args.level)
+        raise ValueError(f"ship '{args.ship}' not found at level {args.level}" + (f", did you mean: {', '.join(suggestions)}?" if suggestions else ""))
+
+    print(f"{ship_row['Ship Name']} (score {ship_score(ship_row, class_df, weights):+.3f}), most similar at level {args.level}:")
+    for rank, ship in enumerate(similar_ships(ship_row, class_df, weights, args.k), start=1):
+        print(f"{rank}. {ship.ship_name}: distance {ship.distance:.3f}, score {ship.score:+.3f}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValueError as e:
+        sys.exit(str(e))
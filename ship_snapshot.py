@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import hashlib
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Compiled snapshot of ship_stats_data so startup doesn't have to parse 32 csv files every time.
+#
+# File layout:
+#   8 bytes   magic
+#   8 bytes   header length (little endian uint64)
+#   header    json describing the string table and every table's columns
+#   data      raw column buffers, starting at the next ALIGNMENT boundary with each buffer aligned to ALIGNMENT bytes
+#
+# Numeric columns are stored as-is (with a separate missing-value mask for nullable integers like the Int16 stats)
+# and come back as read-only views of the memory map.
+# Text columns (names, IDs) are stored as int32 codes into one shared string table, -1 meaning missing.
+# Categorical columns (rarity, nation...) store their codes, with the categories themselves in the string table.
+#
+# Next to it, a small json manifest maps every normalised ship name to the table and row it is in at each level,
+# so a lookup only has to read the one table it needs.
+#
+# Both record a sha256 of the csv files they were built from (see source_hash) and are rebuilt when it no longer
+# matches. File times aren't used, as the onefile exe extracts every file again with new times on each launch.
+# The exe can't keep what it writes either, so the snapshot and manifest are built before bundling:
+#   python ship_snapshot.py [DATA_FOLDER]
+
+SNAPSHOT_FILENAME = "ship_stats.snapshot"
+MANIFEST_FILENAME = "ship_names.manifest.json"
+MAGIC = b"ALSNAP02"
+ALIGNMENT = 64
+
+
+def snapshot_path(data_folder: str) -> str:
+    return os.path.join(data_folder, SNAPSHOT_FILENAME)
+
+
+def csv_files(data_folder: str) -> list[str]:
+    """
+    Names of the csv files in the data folder, e.g. DD_Level_100.csv
+    """
+    if not os.path.isdir(data_folder):
+        return []
+    return sorted(filename for filename in os.listdir(data_folder) if filename.endswith(".csv"))
+
+
+def source_hash(data_folder: str) -> Optional[str]:
+    """
+    sha256 of the names and contents of the csv files in the data folder, None if there are none.
+    """
+    filenames = csv_files(data_folder)
+    if not filenames:
+        return None
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(os.path.join(data_folder, filename), "rb") as f:
+            content = f.read()
+        digest.update(f"{filename}\0{len(content)}\0".encode("utf-8"))
+        digest.update(content)
+    return digest.hexdigest()
+
+
+def is_snapshot_stale(data_folder: str, source: Optional[str] = None) -> bool:
+    """
+    The snapshot needs rebuilding if it is missing or was built from different csv files.
+    source is source_hash(data_folder) if already known.
+    If there are no csv files at all (e.g. only the snapshot was shipped) the snapshot is used as is.
+    """
+    return _is_stale(snapshot_path(data_folder), data_folder, source, lambda path: read_header(path).get("source"))
+
+
+def _is_stale(path: str, data_folder: str, source: Optional[str], read_source) -> bool:
+    if not os.path.exists(path):
+        return True
+
+    if source is None:
+        source = source_hash(data_folder)
+        if source is None:
+            return False
+    try:
+        return read_source(path) != source
+    except (OSError, ValueError, KeyError):
+        return True
+
+
+def write_snapshot(ship_data: dict[str, pd.DataFrame], path: str, source: Optional[str] = None) -> None:
+    """
+    Write every table in ship_data to a single snapshot file, recording source (the source_hash of the csv files
+    the tables were read from). Written to a temporary file first so a half-written snapshot is never picked up.
+    """
+    strings = []
+    string_codes = {}
+    buffers = []
+    tables = {}
+
+    def intern(value) -> int:
+        if not isinstance(value, str):
+            return -1
+        if value not in string_codes:
+            string_codes[value] = len(strings)
+            strings.append(value)
+        return string_codes[value]
+
+    for key, df in ship_data.items():
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            column = {"name": name, "buffer": len(buffers)}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                column["kind"] = "category"
+                column["categories"] = [intern(category) for category in series.cat.categories]
+                column["codes"] = series.cat.codes.dtype.name
+                buffers.append(series.cat.codes.to_numpy())
+            elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series.dtype):
+                # nullable integers (e.g. Int16): the values plus a mask of which are missing
+                column["kind"] = series.dtype.name
+                column["mask"] = len(buffers) + 1
+                buffers.append(series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+                buffers.append(series.isna().to_numpy())
+            elif pd.api.types.is_integer_dtype(series.dtype) or pd.api.types.is_float_dtype(series.dtype):
+                column["kind"] = series.dtype.name
+                buffers.append(series.to_numpy())
+            else:
+                column["kind"] = "str"
+                buffers.append(np.array([intern(value) for value in series], dtype=np.int32))
+            columns.append(column)
+        tables[key] = {"rows": len(df), "columns": columns}
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    string_offsets[1:] = np.cumsum([len(value) for value in encoded])
+    string_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    buffers.append(string_offsets)
+    buffers.append(string_blob)
+
+    # buffer offsets are relative to the start of the data section, which begins after the (aligned) header
+    header = {
+        "source": source,
+        "tables": tables,
+        "strings": {"count": len(strings), "offsets": len(buffers) - 2, "blob": len(buffers) - 1},
+        "buffers": [],
+    }
+    offset = 0
+    for values in buffers:
+        header["buffers"].append({"offset": offset, "nbytes": values.nbytes})
+        offset = _align(offset + values.nbytes)
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(16 + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for values, buffer in zip(buffers, header["buffers"]):
+            f.write(b"\0" * (data_start + buffer["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(values).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> dict:
+    header, _ = _read_header(path)
+    return header
+
+
+def read_snapshot(path: str) -> dict[str, pd.DataFrame]:
+    """
+    Load every table from a snapshot file.
+    Numeric columns are zero-copy views of the memory-mapped file; only the text columns become python strings.
+    """
+    reader = SnapshotReader(path)
+    return {key: reader.read_table(key) for key in reader.keys()}
+
+
+class SnapshotReader:
+    """
+    Reads single tables out of a snapshot file on demand. Opening one only reads the header and maps the file,
+    the string table is decoded the first time a table is read.
+    """
+    def __init__(self, path: str) -> None:
+        self.header, header_length = _read_header(path)
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.data_start = _align(16 + header_length)
+        self.strings = None
+
+    def keys(self) -> list[str]:
+        return list(self.header["tables"])
+
+    def read_table(self, key: str) -> pd.DataFrame:
+        if self.strings is None:
+            self.strings = self._read_strings()
+
+        columns = {}
+        for column in self.header["tables"][key]["columns"]:
+            kind = column["kind"]
+            if kind == "str":
+                columns[column["name"]] = self.strings[self._buffer(column["buffer"], np.int32)]
+            elif kind == "category":
+                codes = self._buffer(column["buffer"], np.dtype(column["codes"]))
+                categories = pd.Index(self.strings[column["categories"]], dtype=str)
+                columns[column["name"]] = pd.Categorical.from_codes(codes, categories=categories)
+            elif "mask" in column:
+                values = self._buffer(column["buffer"], np.dtype(kind.lower()))
+                mask = self._buffer(column["mask"], np.bool_)
+                columns[column["name"]] = pd.arrays.IntegerArray(values, mask)
+            else:
+                columns[column["name"]] = self._buffer(column["buffer"], np.dtype(kind))
+        return pd.DataFrame(columns, copy=False)
+
+    def _read_strings(self) -> np.ndarray:
+        string_offsets = self._buffer(self.header["strings"]["offsets"], np.int64)
+        string_blob = self._buffer(self.header["strings"]["blob"], np.uint8).tobytes()
+        # trailing NaN so code -1 (missing) maps straight to a missing value
+        strings = np.empty(self.header["strings"]["count"] + 1, dtype=object)
+        for i in range(self.header["strings"]["count"]):
+            strings[i] = string_blob[string_offsets[i]:string_offsets[i + 1]].decode("utf-8")
+        strings[-1] = np.nan
+        return strings
+
+    def _buffer(self, index: int, dtype) -> np.ndarray:
+        spec = self.header["buffers"][index]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.data, dtype=dtype, count=spec["nbytes"] // dtype.itemsize, offset=self.data_start + spec["offset"])
+
+
+def manifest_path(data_folder: str) -> str:
+    return os.path.join(data_folder, MANIFEST_FILENAME)
+
+
+def is_manifest_stale(data_folder: str, source: Optional[str] = None) -> bool:
+    """
+    Same rules as is_snapshot_stale, for the name manifest.
+    """
+    return _is_stale(manifest_path(data_folder), data_folder, source, _read_manifest_source)
+
+
+def write_manifest(path: str, keys: list[str], name_index: dict, display_names: dict, source: Optional[str] = None) -> None:
+    """
+    The name manifest lets lookups find which table a ship is in without reading any tables.
+    keys are the table keys, name_index and display_names are as built by al_stats_checker.ShipData,
+    source as for write_snapshot.
+    """
+    manifest = {
+        "source": source,
+        "tables": list(keys),
+        "names": {
+            name: [display_names[name], {level: list(location) for level, location in levels.items()}]
+            for name, levels in name_index.items()
+        },
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path: str) -> tuple[list[str], dict, dict]:
+    """
+    Returns (table keys, name_index, display_names)
+    """
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    name_index = {}
+    display_names = {}
+    for name, (display_name, levels) in manifest["names"].items():
+        name_index[name] = {level: tuple(location) for level, location in levels.items()}
+        display_names[name] = display_name
+    return manifest["tables"], name_index, display_names
+
+
+def main() -> None:
+    """
+    Build the snapshot and manifest of a data folder (default: ship_stats_data), e.g. before bundling the exe.
+    """
+    # imported here, al_stats_checker imports this module itself
+    import al_stats_checker as checker
+
+    data_folder = sys.argv[1] if len(sys.argv) > 1 else checker.resource_path("ship_stats_data")
+    source = source_hash(data_folder)
+    if source is None:
+        sys.exit(f"no csv files in {data_folder}")
+    ship_data = checker.ShipData(checker.load_ship_data_from_csv(data_folder))
+    ship_data.build_name_index()
+    write_snapshot(ship_data, snapshot_path(data_folder), source)
+    write_manifest(manifest_path(data_folder), list(ship_data), ship_data.name_index, ship_data.display_names, source)
+    print(f"Wrote {snapshot_path(data_folder)} and {manifest_path(data_folder)}")
+
+
+def _read_manifest_source(path: str) -> Optional[str]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["source"]
+
+
+def _read_header(path: str) -> tuple[dict, int]:
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            raise ValueError(f"{path} is not a ship stats snapshot")
+        header_length = int.from_bytes(f.read(8), "little")
+        return json.loads(f.read(header_length)), header_length
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+if __name__ == "__main__":
+    main()
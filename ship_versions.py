@@ -0,0 +1,304 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
+import pandas as pd
+import al_stats_checker as checker
+import ship_schema
+import ship_snapshot
+
+# Versions of the dataset, so the stat changes of a game patch can be seen after the scraper has overwritten the csv files.
+# Each version is a snapshot file (the ship_snapshot.py format) in ship_stats_data/versions, named after the time it was saved.
+# The scraper saves one whenever it changes a file (and the data as it was before, if there are no versions yet).
+#
+# Diffs match rows by ship ID within each hull x level table and report added ships, removed ships and every changed value.
+# Each column is compared for all ships at once (the stats as one matrix), not row by row.
+# apply_diff uses a diff to carry everything built for the old data over to the new one where it is still valid,
+# instead of rebuilding it: unchanged tables keep their dataframe (and so their cached aggregates and similarity
+# indexes), and the name index is only redone for the levels where ships were added, removed, renamed or moved.
+#
+#   python ship_versions.py list
+#   python ship_versions.py save
+#   python ship_versions.py diff [OLD [NEW]]      versions by name, "current" for the csv files; default: the last version against current
+#   python ship_versions.py diff OLD NEW --out changes.csv
+
+VERSIONS_FOLDER = "versions"
+VERSION_SUFFIX = ".snapshot"
+CURRENT = "current"
+
+
+@dataclass(slots=True)
+class TableDiff:
+    key: str
+    added: pd.DataFrame  # ID and Ship Name of the ships only in the new table
+    removed: pd.DataFrame  # ... and only in the old one
+    changed: pd.DataFrame  # ID, Ship Name, Column, Old, New for every value that differs
+    rows_moved: bool  # the rows are no longer in the same positions (ships added, removed or reordered)
+    added_columns: list[str] = field(default_factory=list)  # columns only in the new table
+    removed_columns: list[str] = field(default_factory=list)  # ... and only in the old one
+    columns_moved: bool = False  # the columns are no longer in the same order
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.rows_moved or self.columns_moved or self.added_columns or self.removed_columns
+                    or len(self.added) or len(self.removed) or len(self.changed))
+
+    @property
+    def names_changed(self) -> bool:
+        """
+        Whether lookups by name need redoing for this table.
+        """
+        return (self.rows_moved or ship_schema.NAME_COLUMN in self.added_columns + self.removed_columns
+                or bool((self.changed["Column"] == ship_schema.NAME_COLUMN).any()))
+
+
+@dataclass(slots=True)
+class DatasetDiff:
+    tables: dict[str, TableDiff] = field(default_factory=dict)  # tables in both datasets
+    added_tables: list[str] = field(default_factory=list)
+    removed_tables: list[str] = field(default_factory=list)
+
+    @property
+    def unchanged(self) -> bool:
+        return not self.added_tables and not self.removed_tables and all(table.unchanged for table in self.tables.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Every change as one row: Table, Change (added, removed, changed, column added or column removed),
+        ID, Ship Name, Column, Old, New.
+        """
+        frames = []
+        for key, table in self.tables.items():
+            for change, columns in (("column added", table.added_columns), ("column removed", table.removed_columns)):
+                if columns:
+                    frames.append(pd.DataFrame({"Column": columns}).assign(Table=key, Change=change))
+            for change, df in (("added", table.added), ("removed", table.removed), ("changed", table.changed)):
+                if len(df):
+                    frames.append(df.assign(Table=key, Change=change))
+        columns = ["Table", "Change", ship_schema.ID_COLUMN, ship_schema.NAME_COLUMN, "Column", "Old", "New"]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True).reindex(columns=columns)
+
+
+def diff_table(key: str, old_df: pd.DataFrame, new_df: pd.DataFrame) -> TableDiff:
+    """
+    Raises ValueError if either table has the same ID twice, as rows couldn't be matched.
+    """
+    id_column, name_column = ship_schema.ID_COLUMN, ship_schema.NAME_COLUMN
+    # blank rows (retrofits in the level 1 tables) have no ID and can't be matched
+    old = old_df[old_df[id_column].notna()]
+    new = new_df[new_df[id_column].notna()]
+    old_index, new_index = pd.Index(old[id_column]), pd.Index(new[id_column])
+    if not old_index.is_unique or not new_index.is_unique:
+        raise ValueError(f"{key} has duplicate IDs")
+
+    # row of each new ship in the old table and the other way round, -1 if it isn't there
+    old_rows = old_index.get_indexer(new_index)
+    new_rows = new_index.get_indexer(old_index)
+    added = new.loc[old_rows < 0, [id_column, name_column]].reset_index(drop=True)
+    removed = old.loc[new_rows < 0, [id_column, name_column]].reset_index(drop=True)
+
+    both_new = np.flatnonzero(old_rows >= 0)
+    both_old = old_rows[both_new]
+    ids = new[id_column].to_numpy(dtype=object)[both_new]
+    names = new[name_column].to_numpy(dtype=object)[both_new]
+
+    changes = []
+    # all stats at once: one (ships, stats) comparison, missing on both sides counts as equal
+    stats = [column for column in ship_schema.STAT_COLUMNS if column in old.columns and column in new.columns]
+    if stats:
+        old_values = old[stats].to_numpy(dtype=np.float64, na_value=np.nan)[both_old]
+        new_values = new[stats].to_numpy(dtype=np.float64, na_value=np.nan)[both_new]
+        differs = ~((old_values == new_values) | (np.isnan(old_values) & np.isnan(new_values)))
+        rows, columns = np.nonzero(differs)
+        changes.append(_changes(ids[rows], names[rows], np.array(stats, dtype=object)[columns],
+                                _whole_numbers(old_values[rows, columns]), _whole_numbers(new_values[rows, columns])))
+
+    for column in new.columns:
+        if column in stats or column == id_column or column not in old.columns:
+            continue
+        old_values = _objects(old[column])[both_old]
+        new_values = _objects(new[column])[both_new]
+        rows = np.flatnonzero(old_values != new_values)
+        changes.append(_changes(ids[rows], names[rows], np.full(len(rows), column, dtype=object), old_values[rows], new_values[rows]))
+
+    changed = pd.concat(changes, ignore_index=True) if changes else _changes(*[np.empty(0, dtype=object)] * 5)
+    rows_moved = not np.array_equal(_objects(old_df[id_column]), _objects(new_df[id_column]))
+    added_columns = [column for column in new_df.columns if column not in old_df.columns]
+    removed_columns = [column for column in old_df.columns if column not in new_df.columns]
+    columns_moved = [column for column in old_df.columns if column in new_df.columns] != \
+        [column for column in new_df.columns if column in old_df.columns]
+    return TableDiff(key, added, removed, changed, rows_moved, added_columns, removed_columns, columns_moved)
+
+
+def diff_datasets(old_data: dict, new_data: dict) -> DatasetDiff:
+    diff = DatasetDiff()
+    diff.added_tables = [key for key in new_data if key not in old_data]
+    diff.removed_tables = [key for key in old_data if key not in new_data]
+    for key in new_data:
+        if key in old_data:
+            diff.tables[key] = diff_table(key, old_data[key], new_data[key])
+    return diff
+
+
+def apply_diff(diff: DatasetDiff, old_data: checker.ShipData, new_data: checker.ShipData) -> list[str]:
+    """
+    Carries over to new_data what was built for old_data and is still valid:
+    - unchanged tables keep the old dataframe, so aggregates and similarity indexes cached against it are kept
+    - the name index of old_data is reused, redone only for the levels where names changed
+    Returns the keys of the tables that were kept.
+    """
+    kept = []
+    for key, table in diff.tables.items():
+        if table.unchanged:
+            new_data.reuse_table(key, old_data[key])
+            kept.append(key)
+
+    levels = {key.rsplit("_", 1)[-1] for key in diff.added_tables + diff.removed_tables}
+    levels |= {key.rsplit("_", 1)[-1] for key, table in diff.tables.items() if table.names_changed}
+    if levels or not old_data.name_index:
+        new_data.update_name_index(old_data.name_index, old_data.display_names, levels if old_data.name_index else None)
+    else:
+        # the names are the same, so is the search index built from them
+        new_data.set_name_index(old_data.name_index, old_data.display_names, old_data.search_index)
+    return kept
+
+
+def refresh(old_data: checker.ShipData, data_folder: Optional[str] = None) -> tuple[checker.ShipData, DatasetDiff]:
+    """
+    Reads the csv files again and returns the new data with whatever is still valid carried over from old_data
+    (see apply_diff), and the diff. The snapshot and manifest are rewritten if anything changed.
+    """
+    if data_folder is None:
+        data_folder = checker.resource_path("ship_stats_data")
+    new_data = checker.ShipData(checker.load_ship_data_from_csv(data_folder))
+    diff = diff_datasets(old_data, new_data)
+    apply_diff(diff, old_data, new_data)
+    if not diff.unchanged:
+        checker.write_compiled_data(new_data, data_folder)
+    return new_data, diff
+
+
+def versions_folder(data_folder: str) -> str:
+    return os.path.join(data_folder, VERSIONS_FOLDER)
+
+
+def list_versions(data_folder: str) -> list[str]:
+    """
+    Version names, oldest first.
+    """
+    folder = versions_folder(data_folder)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(filename[:-len(VERSION_SUFFIX)] for filename in os.listdir(folder) if filename.endswith(VERSION_SUFFIX))
+
+
+def save_version(ship_data: dict, data_folder: str) -> str:
+    """
+    Saves ship_data as a new version and returns its name.
+    """
+    folder = versions_folder(data_folder)
+    os.makedirs(folder, exist_ok=True)
+    name = base = datetime.now().strftime("%Y%m%d-%H%M%S")
+    suffix = 1
+    while os.path.exists(os.path.join(folder, name + VERSION_SUFFIX)):
+        suffix += 1
+        name = f"{base}-{suffix}"
+    ship_snapshot.write_snapshot(ship_data, os.path.join(folder, name + VERSION_SUFFIX))
+    return name
+
+
+def load_version(data_folder: str, name: str) -> checker.ShipData:
+    """
+    A saved version, or the csv files for CURRENT. Raises ValueError for an unknown version.
+    """
+    if name == CURRENT:
+        return checker.ShipData(checker.load_ship_data_from_csv(data_folder))
+    path = os.path.join(versions_folder(data_folder), name + VERSION_SUFFIX)
+    if not os.path.exists(path):
+        raise ValueError(f"no version '{name}', see python ship_versions.py list")
+    reader = ship_snapshot.SnapshotReader(path)
+    return checker.ShipData(keys=reader.keys(), loader=reader.read_table)
+
+
+def print_diff(diff: DatasetDiff) -> None:
+    if diff.unchanged:
+        print("No changes.")
+        return
+    for key in diff.added_tables:
+        print(f"{key}: new table")
+    for key in diff.removed_tables:
+        print(f"{key}: table removed")
+    for key, table in diff.tables.items():
+        if table.unchanged:
+            continue
+        print(f"{key}: {len(table.added)} added, {len(table.removed)} removed, {len(table.changed)} changed value(s)")
+        for column in table.added_columns:
+            print(f"  + column {column}")
+        for column in table.removed_columns:
+            print(f"  - column {column}")
+        if table.columns_moved:
+            print("  columns reordered")
+        for ship_id, name in zip(table.added[ship_schema.ID_COLUMN], table.added[ship_schema.NAME_COLUMN]):
+            print(f"  + {ship_id} {name}")
+        for ship_id, name in zip(table.removed[ship_schema.ID_COLUMN], table.removed[ship_schema.NAME_COLUMN]):
+            print(f"  - {ship_id} {name}")
+        for row in table.changed.itertuples(index=False):
+            print(f"  ~ {row[0]} {row[1]}: {row.Column} {_format(row.Old)} -> {_format(row.New)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Saved versions of the ship stats data and the changes between them")
+    parser.add_argument("command", choices=["list", "save", "diff"])
+    parser.add_argument("versions", nargs="*", help=f"for diff: OLD [NEW], version names or '{CURRENT}' (default: the last version against {CURRENT})")
+    parser.add_argument("--out", help="for diff: also write every change to this csv file")
+    parser.add_argument("--data", default=checker.resource_path("ship_stats_data"), help="data folder (default: ship_stats_data)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name in list_versions(args.data):
+            print(name)
+    elif args.command == "save":
+        print(f"Saved version {save_version(checker.load_ship_data_from_csv(args.data), args.data)}")
+    else:
+        versions = list_versions(args.data)
+        if len(args.versions) > 2:
+            parser.error("diff takes at most two versions")
+        if not args.versions and not versions:
+            parser.error("no saved versions yet, run: python ship_versions.py save")
+        old = args.versions[0] if args.versions else versions[-1]
+        new = args.versions[1] if len(args.versions) > 1 else CURRENT
+        diff = diff_datasets(load_version(args.data, old), load_version(args.data, new))
+        print(f"{old} -> {new}:")
+        print_diff(diff)
+        if args.out:
+            diff.to_frame().to_csv(args.out, index=False)
+
+
+def _changes(ids, names, columns, old, new) -> pd.DataFrame:
+    return pd.DataFrame({ship_schema.ID_COLUMN: ids, ship_schema.NAME_COLUMN: names, "Column": columns, "Old": old, "New": new})
+
+
+def _whole_numbers(values: np.ndarray) -> np.ndarray:
+    # stats back to ints (None if missing) after the float comparison
+    return np.array([None if np.isnan(value) else int(value) for value in values], dtype=object)
+
+
+def _objects(series: pd.Series) -> np.ndarray:
+    # object array with None for missing values, so != compares missing values as equal to each other
+    return series.to_numpy(dtype=object, na_value=None)
+
+
+def _format(value) -> str:
+    return "-" if value is None else str(value)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except ValueError as e:
+        sys.exit(str(e))
@@ -0,0 +1,169 @@
+import weakref
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, TypeVar
+import numpy as np
+import pandas as pd
+
+# Batched statistics for the comparison modes in al_stats_checker.
+# Every selected stat of a class table is handled at once as a column of one 2D array:
+# a single sort per column gives the median, the above-median subset and (via searchsorted) the rank of any value,
+# so nothing has to be recomputed per stat.
+
+T = TypeVar("T")
+
+
+class ClassStats:
+    """
+    Aggregates for a list of stats over one class table (or a subset of it, e.g. one rarity).
+    Each array attribute has one entry per stat, in the order of `stats`.
+    """
+    __slots__ = (
+        "stats",
+        "sorted_values",
+        "count",
+        "mean",
+        "median",
+        "above_median_start",
+        "above_median_count",
+        "above_median_mean",
+        "above_median_median",
+    )
+
+    def __init__(self, class_df: pd.DataFrame, stats: list[str]) -> None:
+        self.stats = list(stats)
+
+        values = class_df[self.stats].to_numpy(dtype=np.float64, na_value=np.nan)
+        # missing values sort to the end of each column, so the first `count` rows of a column are its real values
+        self.sorted_values = np.sort(values, axis=0)
+        self.count = np.count_nonzero(~np.isnan(values), axis=0)
+
+        # prefix[i, j] is the sum of the i smallest values of stat j
+        prefix = np.zeros((len(values) + 1, len(self.stats)))
+        np.cumsum(np.nan_to_num(self.sorted_values), axis=0, out=prefix[1:])
+
+        zeros = np.zeros_like(self.count)
+        self.mean = _segment_mean(prefix, zeros, self.count)
+        self.median = _segment_median(self.sorted_values, zeros, self.count)
+
+        # the above-median subset is everything from the first value >= median to the end of the real values
+        self.above_median_start = self._searchsorted(self.median, side="left")
+        self.above_median_count = self.count - self.above_median_start
+        self.above_median_mean = _segment_mean(prefix, self.above_median_start, self.count)
+        self.above_median_median = _segment_median(self.sorted_values, self.above_median_start, self.count)
+
+    def subset(self, stats: list[str]) -> "ClassStats":
+        """
+        The same aggregates restricted to (and ordered like) `stats`, without recomputing anything.
+        """
+        columns = [self.stats.index(stat) for stat in stats]
+        subset = ClassStats.__new__(ClassStats)
+        subset.stats = list(stats)
+        for name in ClassStats.__slots__[1:]:
+            values = getattr(self, name)
+            setattr(subset, name, values[:, columns] if values.ndim == 2 else values[columns])
+        return subset
+
+    def ranks(self, values) -> np.ndarray:
+        """
+        Rank of each value among the class (1 = highest), one value per stat.
+        Equal values share a rank, i.e. rank is 1 + the number of ships strictly above the value.
+        """
+        return self.count - self._searchsorted(values, side="right") + 1
+
+    def above_median_ranks(self, values) -> np.ndarray:
+        """
+        Rank of each value among only the ships at or above the median, one value per stat.
+        """
+        return self.count - np.maximum(self._searchsorted(values, side="right"), self.above_median_start) + 1
+
+    def _searchsorted(self, values, side: str) -> np.ndarray:
+        # missing values (NaN or pd.NA) sort after everything, like in sorted_values
+        values = np.array([np.nan if pd.isna(value) else value for value in values], dtype=np.float64)
+        positions = np.empty(len(self.stats), dtype=np.int64)
+        for j, count in enumerate(self.count):
+            positions[j] = np.searchsorted(self.sorted_values[:count, j], values[j], side=side)
+        return positions
+
+
+class TableCache:
+    """
+    Bounded LRU cache of values computed from a table, keyed on the identity of the dataframe plus a key chosen
+    by the caller. Entries are dropped once the dataframe itself is gone, so values computed from the tables of an
+    older load_ship_data never get served.
+    """
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, df: pd.DataFrame, key: Hashable, build: Callable[[], T]) -> T:
+        """
+        The value cached for (df, key), or build() cached as it.
+        """
+        entry_key = (id(df), key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[0]() is df:
+            self._entries.move_to_end(entry_key)
+            return entry[1]
+
+        value = build()
+        # the callback removes the entry as soon as the table is garbage collected
+        ref = weakref.ref(df, lambda _, entry_key=entry_key: self._discard(entry_key))
+        self._entries[entry_key] = (ref, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, entry_key: tuple) -> None:
+        entry = self._entries.get(entry_key)
+        if entry is not None and entry[0]() is None:
+            del self._entries[entry_key]
+
+
+class AggregateCache(TableCache):
+    """
+    ClassStats per class table and rarity, so repeated comparisons against the same class (or the same rarity
+    within it) don't refilter and re-aggregate the table.
+    """
+    def __init__(self, stats: list[str], maxsize: int = 256) -> None:
+        super().__init__(maxsize)
+        self.stats = list(stats)
+
+    def get(self, class_df: pd.DataFrame, rarity: Optional[str] = None) -> ClassStats:
+        """
+        Aggregates of every cached stat over class_df, or over only its ships of the given rarity.
+        """
+        return super().get(class_df, rarity, lambda: self._build(class_df, rarity))
+
+    def _build(self, class_df: pd.DataFrame, rarity: Optional[str]) -> ClassStats:
+        if rarity is None:
+            return ClassStats(class_df, self.stats)
+        return ClassStats(class_df[class_df["Rarity"] == rarity], self.stats)
+
+
+def _segment_mean(prefix: np.ndarray, start: np.ndarray, stop: np.ndarray) -> np.ndarray:
+    columns = np.arange(prefix.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (prefix[stop, columns] - prefix[start, columns]) / (stop - start)
+
+
+def _segment_median(sorted_values: np.ndarray, start: np.ndarray, stop: np.ndarray) -> np.ndarray:
+    """
+    Median of sorted_values[start[j]:stop[j], j] for every column j, NaN for empty segments.
+    """
+    columns = np.arange(sorted_values.shape[1])
+    size = stop - start
+    if len(sorted_values) == 0:
+        return np.full(len(columns), np.nan)
+
+    lower = np.clip(start + (size - 1) // 2, 0, len(sorted_values) - 1)
+    upper = np.clip(start + size // 2, 0, len(sorted_values) - 1)
+    median = (sorted_values[lower, columns] + sorted_values[upper, columns]) / 2
+    median[size == 0] = np.nan
+    return median